@@ -0,0 +1,117 @@
+import logging
+import os
+import time
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.sqlite_utils import ThreadLocalConnection
+
+DEFAULT_MANIFEST_PATH = f"{PROJECT_ROOT_DIR}/ConferencesData/downloads.sqlite"
+
+
+class DownloadManifest:
+    """
+    Persistent record of every download (PDFs, videos, supplementary files).
+
+    One row per target path with its URL, kind, status, size, checksum, last
+    HTTP status and failure count. Planning a resume run is a single query
+    instead of an exists() call per file, and failing URLs are easy to find.
+    """
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_PATH):
+        """
+        Args:
+            path: SQLite file holding the manifest (created if missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = ThreadLocalConnection(self.path)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS downloads ("
+            "path TEXT PRIMARY KEY, url TEXT, kind TEXT, status TEXT, "
+            "size INTEGER, sha256 TEXT, http_status INTEGER, "
+            "failures INTEGER DEFAULT 0, last_error TEXT, updated REAL)"
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS downloads_status ON downloads (kind, status)"
+        )
+        self._conn().commit()
+
+    def completed_paths(self, kind=None, folder=None):
+        """Set of paths already downloaded, optionally limited to a kind/folder."""
+        sql = "SELECT path FROM downloads WHERE status = 'done'"
+        params = []
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if folder is not None:
+            folder = os.path.normpath(str(folder)) + os.sep
+            sql += " AND substr(path, 1, ?) = ?"
+            params.extend([len(folder), folder])
+        return {row[0] for row in self._conn().execute(sql, params)}
+
+    def record_success(self, path, url, kind, size=None, sha256=None, http_status=200):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO downloads (path, url, kind, status, size, sha256, "
+            "http_status, failures, last_error, updated) "
+            "VALUES (?, ?, ?, 'done', ?, ?, ?, 0, NULL, ?) "
+            "ON CONFLICT(path) DO UPDATE SET url = excluded.url, "
+            "kind = excluded.kind, status = 'done', size = excluded.size, "
+            "sha256 = excluded.sha256, http_status = excluded.http_status, "
+            "last_error = NULL, updated = excluded.updated",
+            (os.path.normpath(str(path)), url, kind, size, sha256, http_status, time.time()),
+        )
+        conn.commit()
+
+    def record_failure(self, path, url, kind, http_status=None, error=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO downloads (path, url, kind, status, http_status, "
+            "failures, last_error, updated) VALUES (?, ?, ?, 'failed', ?, 1, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET url = excluded.url, "
+            "status = 'failed', http_status = excluded.http_status, "
+            "failures = downloads.failures + 1, last_error = excluded.last_error, "
+            "updated = excluded.updated",
+            (os.path.normpath(str(path)), url, kind, http_status, error, time.time()),
+        )
+        conn.commit()
+
+    def mark_failed(self, path, error):
+        """Flag a previously recorded file as failed so the next run retries it."""
+        conn = self._conn()
+        conn.execute(
+            "UPDATE downloads SET status = 'failed', failures = failures + 1, "
+            "last_error = ?, updated = ? WHERE path = ?",
+            (error, time.time(), os.path.normpath(str(path))),
+        )
+        conn.commit()
+
+    def stats(self):
+        """{(kind, status): (count, total bytes)} over the whole manifest."""
+        rows = self._conn().execute(
+            "SELECT kind, status, COUNT(*), COALESCE(SUM(size), 0) "
+            "FROM downloads GROUP BY kind, status"
+        )
+        return {(kind, status): (count, size) for kind, status, count, size in rows}
+
+    def stragglers(self, min_failures=3, limit=50):
+        """Failing downloads with the most failures first."""
+        return self._conn().execute(
+            "SELECT path, url, failures, http_status, last_error FROM downloads "
+            "WHERE status = 'failed' AND failures >= ? "
+            "ORDER BY failures DESC LIMIT ?",
+            (min_failures, limit),
+        ).fetchall()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    manifest = DownloadManifest()
+    for (kind, status), (count, size) in sorted(manifest.stats().items()):
+        logging.info(f"{kind:>14} {status:>7}: {count} files, {size / 1e9:.2f} GB")
+    for path, url, failures, http_status, last_error in manifest.stragglers():
+        logging.info(f"{failures}x HTTP {http_status} {url} -> {path}: {last_error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class DownloadScheduler:
+    """
+    One work queue for downloads from every venue, run on N worker threads.
+
+    Jobs are queued per group (e.g. per venue) and handed out round-robin
+    across groups, so small venues don't finish early and leave capacity
+    idle while a huge venue crawls along on its own.
+    """
+
+    def __init__(self, max_workers: int = 8, progress_interval: float = 30.0):
+        """
+        Args:
+            max_workers: Number of worker threads
+            progress_interval: Seconds between aggregate progress log lines
+        """
+        self.max_workers = max_workers
+        self.progress_interval = progress_interval
+        self._queues = OrderedDict()
+        self._fns = dict()
+        self._totals = dict()
+        self._done = dict()
+        self._failed = dict()
+        self._results = dict()
+        self._lock = threading.Lock()
+        self._last_report = 0.0
+        self._started = None
+
+    def add_jobs(self, group, fn, jobs):
+        """
+        Queue fn(*args) for every args tuple in jobs under the given group.
+        A job counts as failed when fn raises or returns None.
+        """
+        with self._lock:
+            queue = self._queues.setdefault(group, deque())
+            queue.extend(tuple(args) for args in jobs)
+            self._totals[group] = self._totals.get(group, 0) + len(jobs)
+            self._done.setdefault(group, 0)
+            self._failed.setdefault(group, 0)
+            self._results.setdefault(group, list())
+            self._fns[group] = fn
+
+    def _next_job(self):
+        with self._lock:
+            while self._queues:
+                group, queue = next(iter(self._queues.items()))
+                # Rotate so the next worker serves the next group
+                self._queues.move_to_end(group)
+                if queue:
+                    return group, self._fns[group], queue.popleft()
+                del self._queues[group]
+            return None
+
+    def _finish(self, group, result):
+        with self._lock:
+            if result is None:
+                self._failed[group] += 1
+            else:
+                self._done[group] += 1
+                self._results[group].append(result)
+            now = time.monotonic()
+            if now - self._last_report >= self.progress_interval:
+                self._last_report = now
+                self._log_progress(now)
+
+    def _log_progress(self, now):
+        done = sum(self._done.values())
+        failed = sum(self._failed.values())
+        total = sum(self._totals.values())
+        elapsed = now - self._started
+        rate = (done + failed) / elapsed if elapsed > 0 else 0.0
+        eta = (total - done - failed) / rate if rate > 0 else float("inf")
+        logging.info(
+            f"Downloads: {done + failed}/{total} ({failed} failed), "
+            f"{rate:.1f} files/s, ETA {eta / 60:.1f} min"
+        )
+        for group in self._totals:
+            logging.info(
+                f"\t{group}: {self._done[group] + self._failed[group]}/{self._totals[group]}"
+            )
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            group, fn, args = job
+            try:
+                result = fn(*args)
+            except Exception as e:
+                logging.error(f"{group}: job {args} failed: {e}")
+                result = None
+            self._finish(group, result)
+
+    def progress(self):
+        """{group: (done, failed, total)} snapshot."""
+        with self._lock:
+            return {
+                group: (self._done[group], self._failed[group], self._totals[group])
+                for group in self._totals
+            }
+
+    def run(self):
+        """
+        Run every queued job to completion.
+
+        Returns:
+            {group: [results of successful jobs]}
+        """
+        self._started = time.monotonic()
+        workers = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(self.max_workers)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        with self._lock:
+            self._log_progress(time.monotonic())
+            return {group: list(results) for group, results in self._results.items()}
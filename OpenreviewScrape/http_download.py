@@ -0,0 +1,126 @@
+import logging
+import os
+import re
+from pathlib import Path
+
+import requests
+from tqdm import tqdm
+
+
+class IncompleteDownloadError(requests.exceptions.RequestException):
+    """The transfer ended before Content-Length bytes were received."""
+
+
+class UnexpectedContentError(requests.exceptions.RequestException):
+    """The server answered with the wrong kind of content (e.g. an HTML error page)."""
+
+
+def part_path(file_path) -> Path:
+    """Temporary path a download is written to until it completes."""
+    file_path = Path(file_path)
+    return file_path.with_name(file_path.name + ".part")
+
+
+def _total_size(response, resume_from):
+    """Full size of the resource, from Content-Range or Content-Length."""
+    content_range = response.headers.get("content-range", "")
+    match = re.search(r"/(\d+)$", content_range)
+    if match:
+        return int(match.group(1))
+    length = response.headers.get("content-length")
+    return int(length) + resume_from if length is not None else None
+
+
+def download_to_path(
+    session,
+    url,
+    file_path,
+    timeout=30,
+    chunk_size=65536,
+    show_progress=True,
+    check_response=None,
+):
+    """
+    Download url atomically into file_path, resuming a previous partial transfer.
+
+    Bytes go to "<file_path>.part", which is renamed to file_path only after the
+    received size matches the server's Content-Length (unencoded transfers
+    are requested; if the server compresses anyway the size check is skipped). If a .part file is
+    already there, the transfer continues from its end with an HTTP Range
+    request (falling back to a full download if the server ignores Range).
+
+    Args:
+        session: requests.Session (or the requests module) to issue the GET with
+        url: URL to download
+        file_path: Final destination
+        timeout: Request timeout in seconds
+        chunk_size: Bytes per write
+        show_progress: Show a tqdm progress bar for this file
+        check_response: Optional callable(response) run before any byte is
+            written; raise from it to reject the response
+
+    Returns:
+        Number of bytes transferred by this call
+    """
+    file_path = Path(file_path)
+    tmp_path = part_path(file_path)
+    resume_from = tmp_path.stat().st_size if tmp_path.exists() else 0
+    # Ask for the raw bytes: Content-Length and Range offsets count encoded
+    # bytes, while iter_content yields decoded ones
+    headers = {"Accept-Encoding": "identity"}
+    if resume_from:
+        headers["Range"] = f"bytes={resume_from}-"
+
+    response = session.get(url, timeout=timeout, stream=True, headers=headers)
+    encoded = response.headers.get("content-encoding", "identity").lower() != "identity"
+    unusable = response.status_code == 416 or (encoded and response.status_code == 206)
+    if unusable and resume_from:
+        # Range not satisfiable (or not usable on an encoded body): the
+        # partial file is stale, start over
+        logging.warning(f"Discarding unusable partial download: {tmp_path}")
+        tmp_path.unlink()
+        response.close()
+        return download_to_path(
+            session, url, file_path, timeout, chunk_size, show_progress, check_response
+        )
+    response.raise_for_status()  # a 416 to a request without Range
+    if unusable:
+        response.close()
+        raise IncompleteDownloadError(
+            f"Got an encoded partial response to a full request for {url}",
+            response=response,
+        )
+    if check_response is not None:
+        check_response(response)
+
+    if resume_from and response.status_code == 206:
+        logging.info(f"Resuming {file_path.name} from byte {resume_from}")
+        mode = "ab"
+    else:
+        resume_from = 0
+        mode = "wb"
+    # The server ignored identity: sizes no longer match what we write
+    total_size = None if encoded else _total_size(response, resume_from)
+
+    transferred = 0
+    with open(tmp_path, mode) as f, tqdm(
+        total=total_size,
+        initial=resume_from,
+        unit="B",
+        unit_scale=True,
+        desc=file_path.name,
+        disable=not show_progress,
+    ) as pbar:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if chunk:
+                f.write(chunk)
+                transferred += len(chunk)
+                pbar.update(len(chunk))
+
+    received = tmp_path.stat().st_size
+    if total_size is not None and received != total_size:
+        raise IncompleteDownloadError(
+            f"Got {received} of {total_size} bytes for {url}; keeping {tmp_path}"
+        )
+    os.replace(tmp_path, file_path)
+    return transferred
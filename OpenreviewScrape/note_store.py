@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+
+CONTENT_PREFIX = "content_"
+
+
+class StoredNote:
+    """
+    Lightweight stand-in for openreview.api.Note as loaded from a NoteStore.
+
+    `content` keeps the OpenReview shape ({field: {"value": ...}}) so code
+    written against openreview notes works unchanged.
+    """
+
+    __slots__ = ("id", "number", "tmdate", "mdate", "content")
+
+    def __init__(self, id, number=None, tmdate=None, mdate=None, content=None):
+        self.id = id
+        self.number = number
+        self.tmdate = tmdate
+        self.mdate = mdate
+        self.content = content if content is not None else {}
+
+    def __repr__(self):
+        return f"StoredNote(id={self.id!r})"
+
+
+class NoteStore:
+    """
+    Columnar SQLite cache of a venue's notes, keyed by note id.
+
+    Every content field gets its own column (JSON-encoded value), so readers
+    can load only the columns they need without importing openreview.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path of the SQLite file (created if missing)
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "id TEXT PRIMARY KEY, position INTEGER, number INTEGER, "
+            "tmdate INTEGER, mdate INTEGER)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def fields(self):
+        """Content fields stored in this venue, in column order."""
+        rows = self.conn.execute("PRAGMA table_info(notes)").fetchall()
+        return [
+            row[1][len(CONTENT_PREFIX) :]
+            for row in rows
+            if row[1].startswith(CONTENT_PREFIX)
+        ]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def latest_modification(self):
+        """Newest tmdate/mdate (ms since epoch) in the store, or None."""
+        return self.conn.execute(
+            "SELECT MAX(COALESCE(tmdate, mdate)) FROM notes"
+        ).fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, json.dumps(value)),
+        )
+        self.conn.commit()
+
+    def clear(self):
+        self.conn.execute("DELETE FROM notes")
+        self.conn.commit()
+
+    def upsert(self, notes):
+        """
+        Insert or replace notes by id; new notes keep arriving order.
+
+        Args:
+            notes: openreview notes or StoredNotes
+
+        Returns:
+            Number of notes written
+        """
+        notes = list(notes)
+        if not notes:
+            return 0
+        existing = set(self.fields())
+        for note in notes:
+            for field in note.content:
+                if field not in existing:
+                    self.conn.execute(
+                        f'ALTER TABLE notes ADD COLUMN "{CONTENT_PREFIX}{field}" TEXT'
+                    )
+                    existing.add(field)
+        fields = self.fields()
+        columns = ["id", "position", "number", "tmdate", "mdate"] + [
+            f'"{CONTENT_PREFIX}{field}"' for field in fields
+        ]
+        updates = ", ".join(
+            f"{column} = excluded.{column}"
+            for column in columns
+            if column not in ("id", "position")
+        )
+        sql = (
+            f"INSERT INTO notes ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(id) DO UPDATE SET {updates}"
+        )
+        position = self.conn.execute(
+            "SELECT COALESCE(MAX(position), -1) FROM notes"
+        ).fetchone()[0]
+        rows = list()
+        for note in notes:
+            position += 1
+            row = [
+                note.id,
+                position,
+                getattr(note, "number", None),
+                getattr(note, "tmdate", None),
+                getattr(note, "mdate", None),
+            ]
+            for field in fields:
+                if field in note.content:
+                    row.append(json.dumps(note.content[field].get("value")))
+                else:
+                    row.append(None)
+            rows.append(row)
+        self.conn.executemany(sql, rows)
+        self.conn.commit()
+        return len(rows)
+
+    def iter_notes(self, columns=None):
+        """
+        Yield StoredNotes in arriving order, decoding only the given columns.
+
+        Args:
+            columns: Content fields to load (None loads all of them)
+        """
+        available = self.fields()
+        if columns is None:
+            columns = available
+        columns = [column for column in columns if column in available]
+        selected = ", ".join(
+            ["id", "number", "tmdate", "mdate"]
+            + [f'"{CONTENT_PREFIX}{column}"' for column in columns]
+        )
+        cursor = self.conn.execute(f"SELECT {selected} FROM notes ORDER BY position")
+        for row in cursor:
+            content = {
+                column: {"value": json.loads(value)}
+                for column, value in zip(columns, row[4:])
+                if value is not None
+            }
+            yield StoredNote(row[0], row[1], row[2], row[3], content)
+
+    def load(self, columns=None):
+        return list(self.iter_notes(columns))
+
+
+class NoteView:
+    """
+    Re-iterable, read-only view of a NoteStore file.
+
+    Each iteration opens its own connection and streams rows from a cursor,
+    so the notes are never held in memory as a whole.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+
+    def __iter__(self):
+        store = NoteStore(self.path)
+        try:
+            yield from store.iter_notes(self.columns)
+        finally:
+            store.close()
+
+    def __len__(self):
+        store = NoteStore(self.path)
+        try:
+            return store.count()
+        finally:
+            store.close()
+
+
+def open_venue_store(cache_folder, safe_venue_id):
+    """Open <cache_folder>/<safe_venue_id>.sqlite, creating the folder if needed."""
+    os.makedirs(cache_folder, exist_ok=True)
+    return NoteStore(f"{cache_folder}/{safe_venue_id}.sqlite")
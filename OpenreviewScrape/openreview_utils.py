@@ -1,3 +1,6 @@
+import base64
+import contextlib
+import json
 import pickle
 import logging
 import argparse
@@ -5,10 +8,14 @@ import logging
 import os
 import re
 from pathlib import Path
+import threading
 import time
 
 import openreview
 
+from OpenreviewScrape import note_store
+from OpenreviewScrape.rate_limit import get_rate_limiter
+
 
 def prepare_parameters_and_logging(
     log_level="INFO",
@@ -65,18 +72,182 @@ def prepare_parameters_and_logging(
     return args
 
 
-def get_client(credentials_file):
+def read_credentials(credentials_file):
     # get file from credential/openreview_api.txt
     with open(credentials_file) as f:
         lines = f.readlines()
         username = lines[0].strip()
         password = lines[1].strip()
+    return username, password
+
+
+def get_client(credentials_file):
+    username, password = read_credentials(credentials_file)
     client = openreview.api.OpenReviewClient(
         baseurl="https://api2.openreview.net", username=username, password=password
     )
     return client
 
 
+def token_expiry(client):
+    """Expiry time (epoch seconds) from the client's JWT, or None if unknown."""
+    try:
+        payload = client.token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"]
+    except Exception:
+        return None
+
+
+API_ERROR_STATUS = {
+    "UnauthorizedError": 401,
+    "TokenExpiredError": 401,
+    "ForbiddenError": 403,
+    "NotFoundError": 404,
+    "TooManyRequestsError": 429,
+    "RateLimitError": 429,
+}
+
+
+def api_error_status(error):
+    """HTTP status behind an OpenReviewException, or None if unknown."""
+    details = error.args[0] if error.args else None
+    if isinstance(details, dict):
+        status = details.get("status")
+        if isinstance(status, int):
+            return status
+        if details.get("name") in API_ERROR_STATUS:
+            return API_ERROR_STATUS[details["name"]]
+        message = str(details.get("message", ""))
+    else:
+        message = str(error)
+    if "429" in message or "too many requests" in message.lower():
+        return 429
+    if "token" in message.lower() and "expired" in message.lower():
+        return 401
+    return None
+
+
+class ClientPool:
+    """
+    Thread-safe pool of logged-in OpenReview clients.
+
+    Clients (and their HTTP sessions) are reused across calls, and tokens are
+    refreshed shortly before they expire instead of after a failed request.
+    """
+
+    def __init__(
+        self,
+        credentials_file,
+        max_clients=8,
+        refresh_margin=300,
+        token_lifetime=3600,
+    ):
+        """
+        Args:
+            credentials_file: Path to the username/password file
+            max_clients: Maximum number of concurrently logged-in clients
+            refresh_margin: Re-login this many seconds before the token expires
+            token_lifetime: Assumed token lifetime when the JWT carries no expiry
+        """
+        self.username, self.password = read_credentials(credentials_file)
+        self.refresh_margin = refresh_margin
+        self.token_lifetime = token_lifetime
+        self._idle = list()
+        self._expiry = dict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_clients)
+
+    def _login(self, client=None):
+        get_rate_limiter().wait()
+        if client is None:
+            client = openreview.api.OpenReviewClient(
+                baseurl="https://api2.openreview.net",
+                username=self.username,
+                password=self.password,
+            )
+        else:
+            client.login_user(username=self.username, password=self.password)
+        expiry = token_expiry(client) or time.time() + self.token_lifetime
+        self._expiry[id(client)] = expiry
+        return client
+
+    def _acquire(self):
+        self._slots.acquire()
+        with self._lock:
+            client = self._idle.pop() if self._idle else None
+        try:
+            if client is None:
+                logging.info("Logging in new OpenReview client")
+                return self._login()
+            if self._expiry[id(client)] - time.time() < self.refresh_margin:
+                logging.info("Refreshing OpenReview token before expiry")
+                return self._login(client)
+            return client
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, client):
+        with self._lock:
+            self._idle.append(client)
+        self._slots.release()
+
+    @contextlib.contextmanager
+    def client(self):
+        client = self._acquire()
+        try:
+            yield client
+        finally:
+            self._release(client)
+
+    def call(self, fn, max_attempts=5):
+        """
+        Run fn(client) with a pooled client, paced by the shared rate limiter.
+
+        A throttled call (429) backs off through the rate limiter and is
+        retried on the same session, up to max_attempts calls in all. Only an
+        auth error (401/403, e.g. a token revoked server-side before its
+        expiry) triggers one re-login, which does not count as an attempt.
+        Any other API error, such as a 404 for a note without a PDF, and the
+        last 429 are raised as is: call never returns without a result.
+        """
+        rate_limiter = get_rate_limiter()
+        relogged = False
+        attempts = 0
+        with self.client() as client:
+            while True:
+                try:
+                    rate_limiter.wait()
+                    result = fn(client)
+                except openreview.OpenReviewException as e:
+                    status = api_error_status(e)
+                    if status in (401, 403) and not relogged:
+                        logging.warning(f"OpenReview auth failed ({e}); re-logging in")
+                        self._login(client)
+                        relogged = True
+                        continue
+                    attempts += 1
+                    if status == 429 and attempts < max_attempts:
+                        rate_limiter.throttled()
+                        continue
+                    raise
+                rate_limiter.succeeded()
+                return result
+
+
+_client_pools = dict()
+_client_pools_lock = threading.Lock()
+
+
+def get_client_pool(credentials_file):
+    """Process-wide ClientPool for a credentials file."""
+    with _client_pools_lock:
+        if credentials_file not in _client_pools:
+            _client_pools[credentials_file] = ClientPool(credentials_file)
+        return _client_pools[credentials_file]
+
+
 def show_all_venues(client):
     # API V2
 
@@ -99,73 +270,231 @@ def normalize_title(title):
     return title
 
 
-def get_notes_helper(client, venue_id):
-    try:
-        # Try the standard invitation format first
-        notes = client.get_all_notes(invitation=f"{venue_id}/-/Submission")
-        return notes
-    except KeyError as e:
-        if "count" in str(e):
-            logging.warning(
-                f"API response missing 'count' field for {venue_id}. Trying alternative approach..."
-            )
+def venue_invitations(venue_id):
+    """Invitation formats tried, in order, when looking for a venue's papers."""
+    return [
+        f"{venue_id}/-/Submission",
+        f"{venue_id}/-/Paper",
+        f"{venue_id}/-/Final_Decision",
+        f"{venue_id}/-/Final_Submission",
+    ]
+
+
+def fetch_notes_paginated(
+    client,
+    store,
+    invitation,
+    rate_limiter=None,
+    page_size=1000,
+    max_page_attempts=5,
+    since=None,
+):
+    """
+    Fetch notes page by page into the store, checkpointing after every page.
+
+    The checkpoint (invitation, since, offset) lives in the store's meta
+    table, so a crash or a rate-limit ban resumes from the last completed
+    page instead of starting over. It is cleared once the last page lands.
+
+    The API has no filter on modification time, so an incremental fetch
+    (since set) pages newest-modified first and stops at the first note
+    modified before `since`.
+
+    Args:
+        since: Only fetch notes with tmdate >= since (ms since epoch)
+
+    Returns:
+        Number of notes fetched (including pages fetched before a resume)
+    """
+    rate_limiter = rate_limiter or get_rate_limiter()
+    checkpoint = store.get_meta("fetch_checkpoint") or {}
+    offset = 0
+    if checkpoint.get("invitation") == invitation and checkpoint.get("since") == since:
+        offset = checkpoint["offset"]
+        logging.info(f"Resuming {invitation} from offset {offset}")
+    sort = "number:asc" if since is None else "tmdate:desc"
+    fetched = offset
+    while True:
+        for attempt in range(max_page_attempts):
             try:
-                # Try getting notes without the count field dependency
-                notes = client.get_notes(invitation=f"{venue_id}/-/Submission")
-                return notes
-            except Exception as e2:
-                logging.error(f"Alternative approach also failed: {e2}")
-                # Try different invitation formats
-                alternative_invitations = [
-                    f"{venue_id}/-/Paper",
-                    f"{venue_id}/-/Final_Decision",
-                    f"{venue_id}/-/Final_Submission",
-                ]
-                for alt_inv in alternative_invitations:
-                    try:
-                        logging.info(f"Trying invitation: {alt_inv}")
-                        notes = client.get_notes(invitation=alt_inv)
-                        if notes:
-                            logging.info(
-                                f"Successfully retrieved {len(notes)} notes using {alt_inv}"
-                            )
-                            return notes
-                    except Exception as e3:
-                        logging.warning(f"Failed with {alt_inv}: {e3}")
-                        continue
-                raise Exception(f"All attempts failed for venue {venue_id}")
-        else:
-            raise e
-
-
-def get_conference(credentials_file, venue_id, cache_folder):
-    # if cache folder does not exist, create it
-    if not os.path.exists(cache_folder):
-        os.makedirs(cache_folder)
-    filename = normalize_venue_id(venue_id) + ".pkl"
-    full_path = f"{cache_folder}/{filename}"
-    if os.path.exists(full_path):
-        logging.info(f"Loading from cache: {full_path}")
-        with open(full_path, "rb") as f:
-            notes = pickle.load(f)
+                rate_limiter.wait()
+                page = client.get_notes(
+                    invitation=invitation,
+                    offset=offset,
+                    limit=page_size,
+                    sort=sort,
+                )
+                rate_limiter.succeeded()
+                break
+            except openreview.OpenReviewException as e:
+                if api_error_status(e) != 429 or attempt == max_page_attempts - 1:
+                    raise
+                logging.warning(f"Throttled at offset {offset} of {invitation}")
+                rate_limiter.throttled()
+        offset += len(page)
+        done = len(page) < page_size
+        if since is not None:
+            changed = [note for note in page if (note.tmdate or 0) >= since]
+            done = done or len(changed) < len(page)
+            page = changed
+        store.upsert(page)
+        fetched += len(page)
+        store.set_meta(
+            "fetch_checkpoint",
+            {"invitation": invitation, "since": since, "offset": offset},
+        )
+        logging.info(f"Fetched {fetched} notes from {invitation}")
+        if done:
+            break
+    if (store.get_meta("fetch_checkpoint") or {}).get("invitation") == invitation:
+        store.set_meta("fetch_checkpoint", None)
+    return fetched
+
+
+def find_store_invitation(client, venue_id, rate_limiter=None):
+    """First invitation format that has any notes for the venue, or None."""
+    rate_limiter = rate_limiter or get_rate_limiter()
+    for invitation in venue_invitations(venue_id):
+        try:
+            rate_limiter.wait()
+            if client.get_notes(invitation=invitation, limit=1):
+                return invitation
+        except openreview.OpenReviewException as e:
+            logging.warning(f"Failed with {invitation}: {e}")
+    return None
+
+
+def fetch_notes_checkpointed(
+    client, venue_id, store, rate_limiter=None, since=None, page_size=1000
+):
+    """
+    Fetch a venue's notes into a NoteStore, trying each invitation format and
+    resuming an interrupted one first.
+
+    The invitation that filled the store is kept in its meta table, and an
+    incremental fetch (since set) only syncs against that one.
+    """
+    invitations = venue_invitations(venue_id)
+    checkpoint = store.get_meta("fetch_checkpoint") or {}
+    if checkpoint.get("invitation") in invitations:
+        invitations.remove(checkpoint["invitation"])
+        invitations.insert(0, checkpoint["invitation"])
+    if since is not None:
+        # Stores filled before the invitation was recorded: look it up once
+        known = store.get_meta("invitation") or find_store_invitation(
+            client, venue_id, rate_limiter
+        )
+        if known is None:
+            raise Exception(f"No invitation with notes found for venue {venue_id}")
+        invitations = [known]
+    for invitation in invitations:
+        try:
+            count = fetch_notes_paginated(
+                client,
+                store,
+                invitation,
+                rate_limiter=rate_limiter,
+                page_size=page_size,
+                since=since,
+            )
+        except openreview.OpenReviewException as e:
+            checkpoint = store.get_meta("fetch_checkpoint") or {}
+            if api_error_status(e) == 429 or checkpoint.get("invitation") == invitation:
+                # Failed after some pages landed: keep the checkpoint so the
+                # next run resumes instead of taking the partial venue as done
+                raise
+            # The first page failed: try the next invitation format
+            logging.warning(f"Failed with {invitation}: {e}")
+            continue
+        if count or since is not None:
+            logging.info(f"Retrieved {count} notes using {invitation}")
+            store.set_meta("invitation", invitation)
+            return count
+    raise Exception(f"All attempts failed for venue {venue_id}")
+
+
+def sync_conference(
+    credentials_file, venue_id, cache_folder, rate_limiter=None, incremental=False
+):
+    """Populate (or incrementally sync) the venue's note store; return its path."""
+    safe_venue_id = normalize_venue_id(venue_id)
+    store = note_store.open_venue_store(cache_folder, safe_venue_id)
+    legacy_path = f"{cache_folder}/{safe_venue_id}.pkl"
+    if store.count() == 0 and os.path.exists(legacy_path):
+        logging.info(f"Migrating pickle cache into note store: {legacy_path}")
+        with open(legacy_path, "rb") as f:
+            store.upsert(pickle.load(f))
+        store.set_meta("tmdate", store.latest_modification())
+
+    checkpoint = store.get_meta("fetch_checkpoint")
+    if checkpoint:
+        logging.info(f"Resuming interrupted fetch of {venue_id}")
+        since = checkpoint.get("since")
+    elif store.count() > 0:
+        logging.info(f"Loading from cache: {store.path}")
+        if not incremental:
+            store.close()
+            return store.path
+        # Only fetch notes modified since the newest one we have seen
+        since = store.get_meta("tmdate") or store.latest_modification()
+        logging.info(f"Syncing {venue_id} changes since tmdate={since}")
     else:
         logging.info(f"Downloading from OpenReview API")
-        client = get_client(credentials_file)
-        notes = get_notes_helper(client, venue_id)
-        with open(full_path, "wb") as f:
-            pickle.dump(notes, f)
+        since = None
+
+    with get_client_pool(credentials_file).client() as client:
+        count = fetch_notes_checkpointed(
+            client, venue_id, store, rate_limiter=rate_limiter, since=since
+        )
+    logging.info(f"Merged {count} notes into {store.path}")
+    store.set_meta("tmdate", store.latest_modification())
+    store.set_meta("synced_at", time.time())
+    store.close()
+    return store.path
 
+
+def get_conference(
+    credentials_file,
+    venue_id,
+    cache_folder,
+    rate_limiter=None,
+    incremental=False,
+    columns=None,
+):
+    path = sync_conference(
+        credentials_file, venue_id, cache_folder, rate_limiter, incremental
+    )
+    store = note_store.NoteStore(path)
+    notes = store.load(columns)
+    store.close()
     return notes
 
 
-def get_pdfs_names_and_urls(notes):
-    names_and_urls = list()
+def get_conference_view(
+    credentials_file,
+    venue_id,
+    cache_folder,
+    rate_limiter=None,
+    incremental=False,
+    columns=None,
+):
+    """Like get_conference, but returns a lazy view that streams from the store."""
+    path = sync_conference(
+        credentials_file, venue_id, cache_folder, rate_limiter, incremental
+    )
+    return note_store.NoteView(path, columns)
+
+
+def iter_pdfs_names_and_urls(notes):
     for note in notes:
         if "pdf" in note.content:
             return_values = get_pdf_url_from_note(note)
             if return_values is not None:
-                names_and_urls.append(return_values)
-    return names_and_urls
+                yield return_values
+
+
+def get_pdfs_names_and_urls(notes):
+    return list(iter_pdfs_names_and_urls(notes))
 
 
 def get_pdf_url_from_note(note):
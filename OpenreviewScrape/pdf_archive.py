@@ -0,0 +1,193 @@
+import logging
+import mmap
+import os
+import tarfile
+import threading
+from pathlib import Path
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.pdf_store import PDFStore
+from OpenreviewScrape.sqlite_utils import ThreadLocalConnection
+
+DEFAULT_ARCHIVE_FOLDER = f"{PROJECT_ROOT_DIR}/ConferencesData/pdf_archive"
+DEFAULT_SHARD_SIZE = 1 << 30
+
+
+def read_member(shard_path, offset, size):
+    """Bytes of one archived PDF, read through a memory map of its shard."""
+    with open(shard_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return m[offset : offset + size]
+
+
+class PDFArchive:
+    """
+    PDF corpus packed into size-bounded tar shards with an offset index.
+
+    Shards are plain uncompressed tars (shard-00000.tar, ...) holding one
+    <sha256>.pdf member per blob, so they rsync and back up as a few large
+    files and stay readable with standard tools. index.sqlite maps note ids
+    to blobs and blobs to (shard, offset, size), so a single paper is read
+    with one slice of a memory-mapped shard instead of unpacking anything.
+    Packing is incremental: new blobs go into new shards, existing shards
+    are never rewritten.
+    """
+
+    def __init__(
+        self, root: str = DEFAULT_ARCHIVE_FOLDER, shard_size: int = DEFAULT_SHARD_SIZE
+    ):
+        """
+        Args:
+            root: Folder holding the shards and index.sqlite
+            shard_size: A shard is closed once it grows past this many bytes
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.shard_size = shard_size
+        self.index_path = self.root / "index.sqlite"
+        self._conn = ThreadLocalConnection(self.index_path)
+        self._maps = dict()
+        self._maps_lock = threading.Lock()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS members ("
+            "sha256 TEXT PRIMARY KEY, shard INTEGER, offset INTEGER, size INTEGER)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "note_id TEXT PRIMARY KEY, sha256 TEXT NOT NULL)"
+        )
+        conn.commit()
+
+    def shard_path(self, shard: int) -> Path:
+        return self.root / f"shard-{shard:05d}.tar"
+
+    def locate_sha256(self, sha256: str):
+        """(shard path, offset, size) of a blob, or None if it is not archived."""
+        row = (
+            self._conn()
+            .execute(
+                "SELECT shard, offset, size FROM members WHERE sha256 = ?", (sha256,)
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        shard, offset, size = row
+        return str(self.shard_path(shard)), offset, size
+
+    def locate(self, note_id: str):
+        """(shard path, offset, size) of a note's PDF, or None."""
+        row = (
+            self._conn()
+            .execute("SELECT sha256 FROM notes WHERE note_id = ?", (note_id,))
+            .fetchone()
+        )
+        return self.locate_sha256(row[0]) if row else None
+
+    def _map(self, shard_path):
+        with self._maps_lock:
+            if shard_path not in self._maps:
+                with open(shard_path, "rb") as f:
+                    self._maps[shard_path] = mmap.mmap(
+                        f.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+            return self._maps[shard_path]
+
+    def read_bytes(self, note_id: str):
+        """PDF bytes of a note, or None if it is not archived."""
+        location = self.locate(note_id)
+        if location is None:
+            return None
+        shard_path, offset, size = location
+        return self._map(shard_path)[offset : offset + size]
+
+    def iter_notes(self):
+        """Yield (note_id, sha256) for every archived note."""
+        yield from self._conn().execute(
+            "SELECT note_id, sha256 FROM notes ORDER BY note_id"
+        ).fetchall()
+
+    def _write_shard(self, shard, sha256s, store):
+        path = self.shard_path(shard)
+        tmp_path = path.with_suffix(".tar.part")
+        with tarfile.open(tmp_path, "w", format=tarfile.GNU_FORMAT) as tar:
+            for sha256 in sha256s:
+                tar.add(store.blob_path(sha256), arcname=f"{sha256}.pdf")
+        # Read the data offsets back from the finished shard
+        with tarfile.open(tmp_path, "r") as tar:
+            rows = [
+                (member.name[: -len(".pdf")], shard, member.offset_data, member.size)
+                for member in tar
+            ]
+        os.replace(tmp_path, path)
+        conn = self._conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO members (sha256, shard, offset, size) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+        logging.info(f"Wrote {path} ({len(rows)} PDFs)")
+
+    def pack(self, store=None, prune=False):
+        """
+        Add every store blob that is not archived yet to new shards.
+
+        Args:
+            store: PDFStore to pack
+            prune: Delete the loose blobs from the store once they are archived
+                (the store index is kept). Hardlinked venue files keep their
+                data; a symlinked one dangles until the next download run,
+                where PDFStore.link restores its blob from the archive
+
+        Returns:
+            Number of blobs added
+        """
+        store = store if store is not None else PDFStore()
+        conn = self._conn()
+        archived = {row[0] for row in conn.execute("SELECT sha256 FROM members")}
+        last = conn.execute("SELECT MAX(shard) FROM members").fetchone()[0]
+        shard = 0 if last is None else last + 1
+
+        notes = list(store.iter_notes())
+        todo = sorted(
+            {
+                sha256
+                for _, sha256 in notes
+                if sha256 not in archived and store.blob_path(sha256).exists()
+            }
+        )
+        logging.info(f"Packing {len(todo)} PDFs into {self.root}")
+        batch, batch_size = list(), 0
+        for sha256 in todo:
+            batch.append(sha256)
+            batch_size += store.blob_path(sha256).stat().st_size
+            if batch_size >= self.shard_size:
+                self._write_shard(shard, batch, store)
+                shard, batch, batch_size = shard + 1, list(), 0
+        if batch:
+            self._write_shard(shard, batch, store)
+
+        archived.update(todo)
+        conn.executemany(
+            "INSERT OR REPLACE INTO notes (note_id, sha256) VALUES (?, ?)",
+            [(note_id, sha256) for note_id, sha256 in notes if sha256 in archived],
+        )
+        conn.commit()
+
+        if prune:
+            for sha256 in archived:
+                blob = store.blob_path(sha256)
+                if blob.exists():
+                    blob.unlink()
+        return len(todo)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    PDFArchive().pack()
+
+
+if __name__ == "__main__":
+    main()
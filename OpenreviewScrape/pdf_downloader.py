@@ -1,11 +1,24 @@
+import concurrent.futures as cf
 import hashlib
 import logging
+import os
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
 from typing import List, Optional
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 import time
-from tqdm import tqdm
+
+from OpenreviewScrape.download_manifest import DownloadManifest
+from OpenreviewScrape.http_download import UnexpectedContentError, download_to_path
+from OpenreviewScrape.pdf_store import PDFStore
+from OpenreviewScrape.telemetry import get_telemetry
+from OpenreviewScrape.rate_limit import (
+    TokenBucket,
+    get_rate_limiter,
+    retry_after_seconds,
+)
 
 
 class PDFDownloader:
@@ -18,7 +31,11 @@ class PDFDownloader:
         download_folder: str,
         timeout: int = 30,
         retry_attempts: int = 3,
-        delay_between_downloads: float = 0.5,
+        rate_limiter: Optional[TokenBucket] = None,
+        max_workers: int = 1,
+        max_per_host: int = 4,
+        store: Optional[PDFStore] = None,
+        manifest: Optional[DownloadManifest] = None,
     ):
         """
         Initialize the PDF downloader.
@@ -27,16 +44,50 @@ class PDFDownloader:
             download_folder: Path to the folder where PDFs will be downloaded
             timeout: Request timeout in seconds
             retry_attempts: Number of retry attempts for failed downloads
+            rate_limiter: Limiter pacing requests (defaults to the global
+                OpenReview limiter shared across processes)
+            max_workers: Number of concurrent downloads in download_pdfs
+            max_per_host: Maximum concurrent requests to any single host
+            store: Content-addressed PDFStore; when given, each PDF is kept
+                once in the store and download_folder holds links into it
+            manifest: DownloadManifest recording every outcome; when given,
+                download_pdfs skips completed files with a single query
         """
         self.download_folder = Path(download_folder)
         self.timeout = timeout
         self.retry_attempts = retry_attempts
-        self.delay_between_downloads = delay_between_downloads
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.store = store
+        self.manifest = manifest
+        self.telemetry = get_telemetry()
+        # One keep-alive session shared by all workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max(1, max_workers), pool_maxsize=max(1, max_workers)
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._host_slots = dict()
+        self._host_slots_lock = threading.Lock()
         # Create download folder if it doesn't exist
         self.download_folder.mkdir(parents=True, exist_ok=True)
 
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.max_per_host)
+            return self._host_slots[host]
+
     def download_pdf(
-        self, url: str, filename: Optional[str] = None, additional_info=""
+        self,
+        url: str,
+        filename: Optional[str] = None,
+        additional_info="",
+        note_id: Optional[str] = None,
+        folder: Optional[str] = None,
     ):
         """
         Download a single PDF from a URL.
@@ -44,60 +95,117 @@ class PDFDownloader:
         Args:
             url: URL of the PDF to download
             filename: Optional custom filename (if None, extracts from URL)
+            note_id: OpenReview note id keying the PDF store (if None, taken
+                from an "?id=" URL)
+            folder: Optional folder overriding download_folder for this file
 
         Returns:
             Path to downloaded file if successful, None otherwise
         """
-        if filename is None:
-            filename = self._extract_filename_from_url(url)
-
-        file_path = self.download_folder / filename
+        file_path = self._target_path(url, filename, folder)
+        if self.store is not None and note_id is None:
+            note_id = self._extract_note_id_from_url(url)
+        use_store = self.store is not None and note_id is not None
 
         # Skip if file already exists
         if file_path.exists():
+            if use_store and self.store.get_sha256(note_id) is None:
+                # Adopt files downloaded before the store existed
+                self.store.add_file(note_id, file_path)
+                self.store.link(note_id, file_path)
             logging.info(f"{additional_info} File already exists: {file_path}")
+            self.telemetry.incr("pdf.skipped")
+            self._record_success(file_path, url, note_id if use_store else None)
+            return str(file_path)
+
+        # Another venue or topic already fetched this paper
+        if use_store and self.store.link(note_id, file_path):
+            logging.info(f"{additional_info} Linked from PDF store: {file_path}")
+            self.telemetry.incr("pdf.linked")
+            self._record_success(file_path, url, note_id)
             return str(file_path)
 
+        # Only created once something is written to it, so planning stays
+        # free of filesystem calls
+        file_path.parent.mkdir(parents=True, exist_ok=True)
         for attempt in range(self.retry_attempts):
             try:
                 logging.info(f"Downloading: {url}")
-                response = requests.get(url, timeout=self.timeout, stream=True)
-                response.raise_for_status()
-
-                # Check if content is actually a PDF
-                content_type = response.headers.get("content-type", "").lower()
-                if "pdf" not in content_type and not url.lower().endswith(".pdf"):
-                    logging.warning(
-                        f"Warning: Content type is {content_type}, may not be a PDF"
+                self.rate_limiter.wait()
+                with self._host_slot(url), self.telemetry.timer("pdf.latency"):
+                    # Written to <file>.part and renamed once complete; an
+                    # existing .part is resumed with a Range request
+                    transferred = download_to_path(
+                        self.session,
+                        url,
+                        file_path,
+                        timeout=self.timeout,
+                        show_progress=self.max_workers <= 1,
+                        check_response=lambda response: self._check_pdf(
+                            url, response
+                        ),
                     )
 
-                # Download with progress bar
-                total_size = int(response.headers.get("content-length", 0))
-
-                with open(file_path, "wb") as f:
-                    with tqdm(
-                        total=total_size, unit="B", unit_scale=True, desc=filename
-                    ) as pbar:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                                pbar.update(len(chunk))
-
+                if use_store:
+                    self.store.add_file(note_id, file_path)
+                    self.store.link(note_id, file_path)
+                self._record_success(file_path, url, note_id if use_store else None)
                 logging.info(f"{additional_info} Successfully downloaded: {file_path}")
-                # Small delay between downloads to be respectful
-                time.sleep(self.delay_between_downloads)
+                self.telemetry.incr("pdf.downloaded")
+                self.telemetry.incr("pdf.bytes", transferred)
+                self.rate_limiter.succeeded()
                 return str(file_path)
 
             except requests.exceptions.RequestException as e:
                 logging.error(f"Attempt {attempt + 1} failed for {url}: {e}")
+                response = getattr(e, "response", None)
+                throttled = response is not None and response.status_code == 429
+                if throttled:
+                    self.rate_limiter.throttled(retry_after_seconds(response))
+                self.telemetry.incr("pdf.errors")
                 if attempt < self.retry_attempts - 1:
-                    time.sleep(2**attempt)  # Exponential backoff
+                    self.telemetry.incr("pdf.retries")
+                    if not throttled:  # the rate limiter already backs off on 429
+                        time.sleep(2**attempt)  # Exponential backoff
+                        self.telemetry.observe("pdf.backoff", 2**attempt)
                 else:
+                    self.telemetry.incr("pdf.failed")
                     logging.error(
                         f"Failed to download {url} after {self.retry_attempts} attempts"
                     )
+                    if self.manifest is not None:
+                        self.manifest.record_failure(
+                            file_path,
+                            url,
+                            "pdf",
+                            http_status=response.status_code if response is not None else None,
+                            error=str(e),
+                        )
                     return None
 
+    def _record_success(self, file_path: Path, url: str, note_id: Optional[str]):
+        if self.manifest is None:
+            return
+        self.manifest.record_success(
+            file_path,
+            url,
+            "pdf",
+            size=file_path.stat().st_size,
+            sha256=self.store.get_sha256(note_id) if note_id else None,
+        )
+
+    @staticmethod
+    def _check_pdf(url: str, response):
+        # Check if content is actually a PDF; an HTML challenge page or JSON
+        # error must not be saved as one
+        content_type = response.headers.get("content-type", "").lower()
+        if content_type.startswith(("text/", "application/json")):
+            raise UnexpectedContentError(
+                f"Expected a PDF but got {content_type}", response=response
+            )
+        if "pdf" not in content_type and not url.lower().endswith(".pdf"):
+            logging.warning(f"Warning: Content type is {content_type}, may not be a PDF")
+
     def download_pdfs(
         self,
         pdf_urls: List[str],
@@ -117,23 +225,92 @@ class PDFDownloader:
         if filenames and len(filenames) != len(pdf_urls):
             raise ValueError("Number of filenames must match number of URLs")
 
-        downloaded_files = []
-
         logging.info(
             f"Starting download of {len(pdf_urls)} PDFs to {self.download_folder}"
         )
 
-        for i, url in enumerate(pdf_urls):
-            filename = filenames[i] if filenames else None
-            file_path = self.download_pdf(url, filename, additional_info)
+        # Paths in input order; None until downloaded (or known to be done)
+        results = [None] * len(pdf_urls)
+        todo = self.pending(pdf_urls, filenames, results=results)
+        logging.info(
+            f"{additional_info} {len(pdf_urls) - len(todo)} PDFs already in manifest"
+        )
+
+        if self.max_workers <= 1:
+            for n, i in enumerate(todo):
+                filename = filenames[i] if filenames else None
+                results[i] = self.download_pdf(pdf_urls[i], filename, additional_info)
+
+                logging.info(
+                    f"{additional_info} {n+1}/{len(todo)}: Downloaded {sum(1 for r in results if r)} out of {len(pdf_urls)} PDFs"
+                )
+        else:
+            with cf.ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+                futures = {
+                    ex.submit(
+                        self.download_pdf,
+                        pdf_urls[i],
+                        filenames[i] if filenames else None,
+                        additional_info,
+                    ): i
+                    for i in todo
+                }
+                for n, future in enumerate(cf.as_completed(futures)):
+                    results[futures[future]] = future.result()
+                    logging.info(
+                        f"{additional_info} {n+1}/{len(todo)}: Finished {n+1} out of {len(todo)} PDFs"
+                    )
+        downloaded_files = [file_path for file_path in results if file_path]
+        return downloaded_files
+
+    def pending(
+        self,
+        pdf_urls: List[str],
+        filenames: Optional[List[str]] = None,
+        folder: Optional[str] = None,
+        results: Optional[list] = None,
+    ) -> List[int]:
+        """
+        Indices of the URLs still to download, using one manifest query.
 
-            if file_path:
-                downloaded_files.append(file_path)
+        Args:
+            pdf_urls: List of PDF URLs
+            filenames: Optional list of custom filenames
+            folder: Optional folder overriding download_folder
+            results: Optional list filled with the paths of completed files
 
-            logging.info(
-                f"{additional_info} {i+1}/{len(pdf_urls)}: Downloaded {len(downloaded_files)} out of {len(pdf_urls)} PDFs"
+        Returns:
+            Indices into pdf_urls that are not yet downloaded
+        """
+        if self.manifest is None:
+            return list(range(len(pdf_urls)))
+        done = self.manifest.completed_paths(
+            kind="pdf", folder=folder or self.download_folder
+        )
+        todo = list()
+        for i, url in enumerate(pdf_urls):
+            file_path = self._target_path(
+                url, filenames[i] if filenames else None, folder
             )
-        return downloaded_files
+            if os.path.normpath(file_path) not in done:
+                todo.append(i)
+            elif results is not None:
+                results[i] = str(file_path)
+        return todo
+
+    def _target_path(
+        self, url: str, filename: Optional[str], folder: Optional[str] = None
+    ) -> Path:
+        if filename is None:
+            filename = self._extract_filename_from_url(url)
+        if folder is not None:
+            return Path(folder) / filename
+        return self.download_folder / filename
+
+    @staticmethod
+    def _extract_note_id_from_url(url: str) -> Optional[str]:
+        """OpenReview note id from a ".../pdf?id=<note_id>" URL, or None."""
+        return (parse_qs(urlparse(url).query).get("id") or [None])[0]
 
     def _extract_filename_from_url(self, url: str) -> str:
         """
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.sqlite_utils import ThreadLocalConnection
+
+DEFAULT_STORE_FOLDER = f"{PROJECT_ROOT_DIR}/ConferencesData/pdf_store"
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PDFStore:
+    """
+    Content-addressed PDF store shared by every venue and topic folder.
+
+    Each PDF is kept once as blobs/<sha[:2]>/<sha>.pdf; an SQLite index maps
+    OpenReview note ids to blobs. Per-venue and per-topic folders are built
+    from hardlinks (or symlinks across filesystems) into the store. Blobs
+    pruned after packing into a PDFArchive are copied back out of the
+    archive when a note needs its file again.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_FOLDER, archive=None):
+        """
+        Args:
+            root: Folder holding blobs/ and index.sqlite
+            archive: PDFArchive holding pruned blobs (defaults to the standard
+                archive when it exists)
+        """
+        self.root = Path(root)
+        self.archive = archive
+        (self.root / "blobs").mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.sqlite"
+        self._conn = ThreadLocalConnection(self.index_path)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "note_id TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER, "
+            "added REAL)"
+        )
+        self._conn().execute(
+            "CREATE INDEX IF NOT EXISTS notes_sha256 ON notes (sha256)"
+        )
+        self._conn().commit()
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / "blobs" / sha256[:2] / f"{sha256}.pdf"
+
+    def get_sha256(self, note_id: str):
+        row = (
+            self._conn()
+            .execute("SELECT sha256 FROM notes WHERE note_id = ?", (note_id,))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def _archived(self, sha256):
+        """(shard path, offset, size) of a blob in the archive, or None."""
+        if self.archive is None:
+            # Imported here: pdf_archive imports this module
+            from OpenreviewScrape.pdf_archive import DEFAULT_ARCHIVE_FOLDER, PDFArchive
+
+            if not os.path.exists(DEFAULT_ARCHIVE_FOLDER):
+                return None
+            self.archive = PDFArchive()
+        return self.archive.locate_sha256(sha256)
+
+    def _restore(self, sha256):
+        """Copy a pruned blob back from the archive; False if it is not archived."""
+        from OpenreviewScrape.pdf_archive import read_member
+
+        location = self._archived(sha256)
+        if location is None:
+            return False
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(read_member(*location))
+        os.replace(tmp, blob)
+        logging.debug(f"Restored {blob} from the archive")
+        return True
+
+    def get_path(self, note_id: str):
+        """
+        Blob path for a note id, or None if the note is not in the store.
+        A blob pruned after archiving is restored from the archive first.
+        """
+        sha256 = self.get_sha256(note_id)
+        if sha256 is None:
+            return None
+        path = self.blob_path(sha256)
+        if path.exists() or self._restore(sha256):
+            return path
+        return None
+
+    def iter_notes(self):
+        """Yield (note_id, sha256) for every indexed note."""
+        yield from self._conn().execute(
+            "SELECT note_id, sha256 FROM notes ORDER BY note_id"
+        ).fetchall()
+
+    def read_bytes(self, note_id: str):
+        """PDF bytes of a note, read from the archive if its blob was pruned."""
+        sha256 = self.get_sha256(note_id)
+        if sha256 is None:
+            return None
+        path = self.blob_path(sha256)
+        if path.exists():
+            return path.read_bytes()
+        location = self._archived(sha256)
+        if location is None:
+            return None
+        from OpenreviewScrape.pdf_archive import read_member
+
+        return read_member(*location)
+
+    def _index(self, note_id, sha256, size):
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO notes (note_id, sha256, size, added) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(note_id) DO UPDATE SET sha256 = excluded.sha256, "
+            "size = excluded.size, added = excluded.added",
+            (note_id, sha256, size, time.time()),
+        )
+        conn.commit()
+
+    def add_file(self, note_id: str, path) -> str:
+        """
+        Move a downloaded file into the store (dropping it if the blob exists)
+        and index it under note_id.
+
+        Returns:
+            sha256 of the file
+        """
+        path = Path(path)
+        sha256 = sha256_file(path)
+        blob = self.blob_path(sha256)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        size = path.stat().st_size
+        if blob.exists():
+            path.unlink()
+        else:
+            os.replace(path, blob)
+        self._index(note_id, sha256, size)
+        return sha256
+
+    def add_bytes(self, note_id: str, data: bytes) -> str:
+        """Store PDF bytes (e.g. from client.get_pdf) under note_id."""
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self.add_file(note_id, tmp)
+
+    def discard(self, sha256: str):
+        """Drop a (corrupt) blob and every index entry pointing at it."""
+        conn = self._conn()
+        conn.execute("DELETE FROM notes WHERE sha256 = ?", (sha256,))
+        conn.commit()
+        blob = self.blob_path(sha256)
+        if blob.exists():
+            blob.unlink()
+
+    def link(self, note_id: str, dest) -> bool:
+        """
+        Make dest point at the note's blob: a hardlink, or a symlink when the
+        store lives on another filesystem. Returns False if the note is unknown.
+        """
+        blob = self.get_path(note_id)
+        if blob is None:
+            return False
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.is_symlink() or dest.exists():
+            dest.unlink()
+        try:
+            os.link(blob, dest)
+        except OSError:
+            os.symlink(os.path.abspath(blob), dest)
+        logging.debug(f"Linked {dest} -> {blob}")
+        return True
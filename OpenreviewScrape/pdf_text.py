@@ -0,0 +1,220 @@
+import concurrent.futures as cf
+import importlib.util
+import io
+import logging
+import os
+import shutil
+import subprocess
+import time
+import zlib
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.pdf_archive import (
+    DEFAULT_ARCHIVE_FOLDER,
+    PDFArchive,
+    read_member,
+)
+from OpenreviewScrape.pdf_store import PDFStore
+from OpenreviewScrape.sqlite_utils import ThreadLocalConnection
+
+DEFAULT_TEXT_STORE_PATH = f"{PROJECT_ROOT_DIR}/ConferencesData/pdf_text.sqlite"
+
+
+def extraction_backend():
+    """Text extraction backend to use: pypdf, else pdftotext, else None."""
+    if importlib.util.find_spec("pypdf") is not None:
+        return "pypdf"
+    if shutil.which("pdftotext") is not None:
+        return "pdftotext"
+    return None
+
+
+def extract_text(source):
+    """
+    Plain text of a PDF, page by page.
+
+    Uses pypdf when it is installed, otherwise the poppler `pdftotext` tool.
+
+    Args:
+        source: Path of the PDF, or its (shard path, offset, size) location
+            in a PDFArchive
+
+    Returns:
+        (text, None) on success, or (None, reason) if the text could not be read
+
+    Raises:
+        RuntimeError: If neither backend is installed
+    """
+    backend = extraction_backend()
+    if backend is None:
+        raise RuntimeError("neither pypdf nor pdftotext is installed")
+    try:
+        data = read_member(*source) if isinstance(source, tuple) else None
+        if backend == "pypdf":
+            from pypdf import PdfReader
+
+            reader = PdfReader(io.BytesIO(data) if data is not None else source)
+            pages = [page.extract_text() or "" for page in reader.pages]
+            return "\n\f".join(pages), None
+        result = subprocess.run(
+            ["pdftotext", "-q", "-enc", "UTF-8", "-" if data is not None else str(source), "-"],
+            input=data,
+            capture_output=True,
+            timeout=300,
+        )
+        if result.returncode != 0:
+            return None, f"pdftotext exited with {result.returncode}"
+        return result.stdout.decode("utf-8", errors="replace"), None
+    except Exception as e:
+        return None, f"extraction error: {e}"
+
+
+class TextStore:
+    """
+    zlib-compressed full text of every PDF in the store, keyed by note id.
+
+    Each row remembers the sha256 of the blob it was extracted from, so an
+    extraction run only touches notes whose PDF is new or has changed.
+    """
+
+    def __init__(self, path: str = DEFAULT_TEXT_STORE_PATH):
+        """
+        Args:
+            path: SQLite file holding the texts (created if missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = ThreadLocalConnection(self.path)
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS texts ("
+            "note_id TEXT PRIMARY KEY, sha256 TEXT NOT NULL, chars INTEGER, "
+            "text BLOB, error TEXT, extracted REAL)"
+        )
+        self._conn().commit()
+
+    def extracted(self):
+        """{note_id: sha256} for every note whose text was extracted successfully."""
+        return dict(
+            self._conn().execute(
+                "SELECT note_id, sha256 FROM texts WHERE text IS NOT NULL"
+            )
+        )
+
+    def put(self, note_id, sha256, text=None, error=None):
+        data = zlib.compress(text.encode("utf-8"), 6) if text is not None else None
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO texts (note_id, sha256, chars, text, error, extracted) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(note_id) DO UPDATE SET sha256 = excluded.sha256, "
+            "chars = excluded.chars, text = excluded.text, "
+            "error = excluded.error, extracted = excluded.extracted",
+            (
+                note_id,
+                sha256,
+                len(text) if text is not None else None,
+                data,
+                error,
+                time.time(),
+            ),
+        )
+        conn.commit()
+
+    def get(self, note_id):
+        """Full text of a note's PDF, or None if it is missing or failed."""
+        row = (
+            self._conn()
+            .execute("SELECT text FROM texts WHERE note_id = ?", (note_id,))
+            .fetchone()
+        )
+        if row is None or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8")
+
+    def iter_texts(self):
+        """Yield (note_id, text) for every successfully extracted note."""
+        rows = self._conn().execute(
+            "SELECT note_id, text FROM texts WHERE text IS NOT NULL ORDER BY note_id"
+        )
+        for note_id, data in rows:
+            yield note_id, zlib.decompress(data).decode("utf-8")
+
+
+def extract_store_texts(
+    store=None, text_store=None, max_workers=None, archive=None
+):
+    """
+    Extract the text of every PDF in the store that is not in the text store yet.
+
+    Blobs are parsed on a process pool; a blob shared by several notes is
+    parsed once. Notes whose loose blob was pruned are read from the
+    archive shards instead. Notes whose extraction failed are tried again.
+
+    Args:
+        store: PDFStore to read blobs from
+        text_store: TextStore receiving the texts
+        max_workers: Size of the process pool (defaults to the CPU count)
+        archive: PDFArchive holding packed blobs (defaults to the standard
+            archive when it exists)
+
+    Returns:
+        (number of notes extracted, number of failures)
+
+    Raises:
+        RuntimeError: If neither pypdf nor pdftotext is installed
+    """
+    if extraction_backend() is None:
+        raise RuntimeError(
+            "Cannot extract PDF text: neither pypdf nor pdftotext is installed"
+        )
+    store = store if store is not None else PDFStore()
+    text_store = text_store if text_store is not None else TextStore()
+    if archive is None and os.path.exists(DEFAULT_ARCHIVE_FOLDER):
+        archive = PDFArchive()
+    done = text_store.extracted()
+
+    # sha256 -> note ids still needing that blob's text
+    todo = dict()
+    notes = list(store.iter_notes())
+    if archive is not None:
+        notes.extend(archive.iter_notes())
+    for note_id, sha256 in notes:
+        if done.get(note_id) != sha256 and note_id not in todo.get(sha256, []):
+            todo.setdefault(sha256, []).append(note_id)
+
+    # Prefer the loose blob, fall back to its location in the archive
+    sources = dict()
+    for sha256 in todo:
+        if store.blob_path(sha256).exists():
+            sources[sha256] = store.blob_path(sha256)
+        elif archive is not None and archive.locate_sha256(sha256) is not None:
+            sources[sha256] = archive.locate_sha256(sha256)
+    logging.info(f"Extracting text from {len(sources)} new or changed PDFs")
+
+    extracted = failed = 0
+    sha256s = list(sources)
+    with cf.ProcessPoolExecutor(max_workers=max_workers) as ex:
+        results = ex.map(
+            extract_text, [sources[sha256] for sha256 in sha256s], chunksize=8
+        )
+        for i, (sha256, (text, error)) in enumerate(zip(sha256s, results), 1):
+            for note_id in todo[sha256]:
+                text_store.put(note_id, sha256, text=text, error=error)
+            if error is None:
+                extracted += len(todo[sha256])
+            else:
+                failed += len(todo[sha256])
+                logging.warning(f"No text for {todo[sha256]}: {error}")
+            if i % 500 == 0:
+                logging.info(f"Extracted {i}/{len(sha256s)} PDFs")
+    logging.info(f"Extracted text of {extracted} notes ({failed} failed)")
+    return extracted, failed
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    extract_store_texts()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import concurrent.futures as cf
+import json
+import logging
+import os
+from pathlib import Path
+
+from OpenreviewScrape.pdf_store import sha256_file
+
+VALID = "ok"
+
+
+def validate_pdf(path):
+    """
+    Check that a file is a real, parseable PDF.
+
+    Looks for the %PDF header and %%EOF trailer, then parses the file with
+    pypdf when it is installed (otherwise only requires a startxref table).
+
+    Returns:
+        VALID, or a short reason the file is not a usable PDF
+    """
+    try:
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            head = f.read(1024)
+            f.seek(max(0, size - 2048))
+            tail = f.read()
+    except OSError as e:
+        return f"unreadable: {e}"
+    if b"%PDF-" not in head:
+        if b"<html" in head.lower() or b"<!doctype" in head.lower():
+            return "html page saved as pdf"
+        return "missing %PDF header"
+    if b"%%EOF" not in tail:
+        return "missing %%EOF trailer (truncated?)"
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return VALID if b"startxref" in tail else "missing startxref"
+    try:
+        if len(PdfReader(path).pages) == 0:
+            return "no pages"
+    except Exception as e:
+        return f"parse error: {e}"
+    return VALID
+
+
+class PDFValidator:
+    """
+    Parallel validation pass over PDF folders with a per-file verdict cache.
+
+    Verdicts are cached by (size, mtime), so repeat scans only open files that
+    are new or changed since the last scan.
+    """
+
+    def __init__(self, cache_path: str, max_workers: int = None):
+        """
+        Args:
+            cache_path: JSON file holding {path: [size, mtime_ns, verdict]}
+            max_workers: Size of the process pool (defaults to the CPU count)
+        """
+        self.cache_path = cache_path
+        self.max_workers = max_workers
+        self.cache = dict()
+        if os.path.exists(cache_path):
+            with open(cache_path) as f:
+                self.cache = json.load(f)
+
+    def save(self):
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def scan(self, folders):
+        """
+        Validate every *.pdf under the given folders.
+
+        Returns:
+            {path: reason} for files that are not valid PDFs
+        """
+        todo = list()
+        bad = dict()
+        for folder in folders:
+            for path in Path(folder).rglob("*.pdf"):
+                key = str(path)
+                try:
+                    stat = path.stat()
+                except OSError as e:  # e.g. a symlink whose blob was pruned
+                    logging.warning(f"Invalid PDF {key}: unreadable or dangling")
+                    bad[key] = f"unreadable or dangling: {e}"
+                    continue
+                cached = self.cache.get(key)
+                if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+                    if cached[2] != VALID:
+                        bad[key] = cached[2]
+                    continue
+                todo.append((key, stat.st_size, stat.st_mtime_ns))
+        logging.info(f"Validating {len(todo)} new or changed PDFs")
+
+        with cf.ProcessPoolExecutor(max_workers=self.max_workers) as ex:
+            verdicts = ex.map(
+                validate_pdf, [key for key, _, _ in todo], chunksize=32
+            )
+            for (key, size, mtime_ns), verdict in zip(todo, verdicts):
+                self.cache[key] = [size, mtime_ns, verdict]
+                if verdict != VALID:
+                    logging.warning(f"Invalid PDF {key}: {verdict}")
+                    bad[key] = verdict
+        self.save()
+        return bad
+
+    def repair(self, bad, manifest=None, store=None):
+        """
+        Remove invalid files so the next download run fetches them again.
+
+        The files are deleted and marked failed in the manifest. Their blobs
+        are also dropped from the PDF store, so nothing links them back in.
+        """
+        for path, reason in bad.items():
+            if store is not None and os.path.exists(path):
+                store.discard(sha256_file(path))
+            if os.path.lexists(path):
+                os.remove(path)
+            if manifest is not None:
+                manifest.mark_failed(path, f"invalid pdf: {reason}")
+            self.cache.pop(path, None)
+        self.save()
+        logging.info(f"Re-queued {len(bad)} invalid PDFs for download")
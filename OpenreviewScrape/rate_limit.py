@@ -0,0 +1,263 @@
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: fall back to per-process limiting
+    fcntl = None
+
+from OpenreviewScrape.definitions import CACHE_FOLDER, CONFIG
+from OpenreviewScrape.telemetry import get_telemetry
+
+DEFAULT_REQUESTS_PER_SECOND = CONFIG.getfloat(
+    "openreview", "requests_per_second", fallback=4.0
+)
+DEFAULT_STATE_PATH = f"{CACHE_FOLDER}/openreview_rate_limit.json"
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every thread and process using the same state file.
+
+    The bucket state (tokens, current rate, backoff deadline) lives in a small
+    JSON file guarded by an exclusive file lock, so parallel venue processes
+    draw from one global budget. The rate adapts: it is halved whenever the
+    server throttles us and creeps back up towards `max_rate` on success.
+    """
+
+    def __init__(
+        self,
+        state_path: str,
+        max_rate: float,
+        burst: float = None,
+        min_rate: float = 0.2,
+        increase_step: float = 0.05,
+    ):
+        """
+        Args:
+            state_path: JSON file holding the shared bucket state
+            max_rate: Upper bound on requests per second across all callers
+            burst: Bucket capacity (defaults to max_rate, at least 1)
+            min_rate: Rate never drops below this after throttling
+            increase_step: Requests/second added back after each success
+        """
+        self.state_path = state_path
+        self.max_rate = max_rate
+        self.burst = burst if burst is not None else max(1.0, max_rate)
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+
+    def _update(self, fn):
+        """Apply fn(state, now) to the shared state under the file lock."""
+        with self._lock, open(self.state_path, "a+") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else {}
+                except ValueError:
+                    state = {}
+                now = time.time()
+                rate = min(state.get("rate", self.max_rate), self.max_rate)
+                updated = state.get("updated", now)
+                state["rate"] = rate
+                state["tokens"] = min(
+                    self.burst,
+                    state.get("tokens", self.burst) + max(0.0, now - updated) * rate,
+                )
+                state["updated"] = now
+                result = fn(state, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def wait(self):
+        """Block until a request may be issued, then consume one token."""
+
+        def take(state, now):
+            blocked_until = state.get("blocked_until", 0.0)
+            if blocked_until > now:
+                return blocked_until - now
+            if state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                return 0.0
+            return (1.0 - state["tokens"]) / state["rate"]
+
+        waited = 0.0
+        while True:
+            delay = self._update(take)
+            if delay <= 0.0:
+                break
+            time.sleep(delay)
+            waited += delay
+        if waited > 0.0:
+            get_telemetry().observe("rate_limit.wait", waited)
+
+    def throttled(self, retry_after=None):
+        """Record a throttling response (e.g. HTTP 429) and back off."""
+
+        def back_off(state, now):
+            state["rate"] = max(self.min_rate, state["rate"] / 2.0)
+            state["tokens"] = 0.0
+            if retry_after:
+                state["blocked_until"] = max(
+                    state.get("blocked_until", 0.0), now + retry_after
+                )
+            return state["rate"]
+
+        rate = self._update(back_off)
+        get_telemetry().incr("rate_limit.throttled")
+        logging.warning(f"Throttled by server; rate lowered to {rate:.2f} req/s")
+
+    def succeeded(self):
+        """Record a successful request, nudging the rate back up."""
+
+        def speed_up(state, now):
+            state["rate"] = min(self.max_rate, state["rate"] + self.increase_step)
+
+        self._update(speed_up)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the number of requests in flight.
+
+    Every success raises the limit by `increase` per window of requests
+    (additive increase); a throttling signal multiplies it by `decrease`
+    (multiplicative decrease) and blocks new requests until any Retry-After
+    deadline has passed. Throttles arriving within one `cooldown` of the
+    last decrease count once, since they stem from the same burst.
+    """
+
+    def __init__(
+        self,
+        initial: float = 2,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        default_backoff: float = 2.0,
+        cooldown: float = 1.0,
+    ):
+        """
+        Args:
+            initial: Starting number of requests in flight
+            min_limit: The limit never drops below this
+            max_limit: The limit never grows above this
+            increase: Requests added to the limit per window of successes
+            decrease: Factor applied to the limit on throttling
+            default_backoff: Pause in seconds when a throttle has no Retry-After
+            cooldown: Seconds after a decrease during which throttles are ignored
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.default_backoff = default_backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.completed = 0
+        self.throttles = 0
+        self.started = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Hold one of the `limit` in-flight slots for the duration of a request."""
+        with self._cond:
+            while True:
+                delay = self._blocked_until - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    def succeeded(self):
+        with self._cond:
+            self.completed += 1
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+    def throttled(self, retry_after=None):
+        """Record a throttling response (e.g. HTTP 429) and back off."""
+        with self._cond:
+            self.throttles += 1
+            now = time.monotonic()
+            pause = retry_after if retry_after is not None else self.default_backoff
+            self._blocked_until = max(self._blocked_until, now + pause)
+            if now - self._last_decrease >= self.cooldown:
+                self._last_decrease = now
+                self.limit = max(self.min_limit, self.limit * self.decrease)
+                logging.info(
+                    f"Throttled; concurrency lowered to {int(self.limit)}, "
+                    f"pausing {pause:.1f}s"
+                )
+
+    def rate(self):
+        """Achieved successful requests per second since creation."""
+        elapsed = time.monotonic() - self.started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        return (
+            f"{self.completed} requests at {self.rate():.2f} req/s, "
+            f"concurrency {int(self.limit)}, {self.throttles} throttled"
+        )
+
+
+def retry_after_seconds(response):
+    """Seconds from a Retry-After header (delta-seconds form), or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter(requests_per_second=None):
+    """
+    The TokenBucket shared by all OpenReview traffic.
+
+    Args:
+        requests_per_second: Overrides the global rate (defaults to the
+            [openreview] requests_per_second setting in config.txt)
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = TokenBucket(
+                DEFAULT_STATE_PATH, DEFAULT_REQUESTS_PER_SECOND
+            )
+        if requests_per_second:
+            _rate_limiter.max_rate = requests_per_second
+            _rate_limiter.burst = max(1.0, requests_per_second)
+        return _rate_limiter
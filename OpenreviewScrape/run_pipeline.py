@@ -2,12 +2,21 @@ import os
 import logging
 from OpenreviewScrape import openreview_utils
 from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.download_manifest import DownloadManifest
 from OpenreviewScrape.pdf_downloader import PDFDownloader
+from OpenreviewScrape.download_scheduler import DownloadScheduler
+from OpenreviewScrape.pdf_store import PDFStore
+from OpenreviewScrape.pdf_text import extract_store_texts
+from OpenreviewScrape.pdf_validation import PDFValidator
 from OpenreviewScrape.video_utils import (
     download_openreview_video,
     download_spotlight_videos_pipeline,
 )
-import multiprocessing as mp
+from OpenreviewScrape.rate_limit import get_rate_limiter
+from OpenreviewScrape.scrape_cache import ScrapeCache
+from OpenreviewScrape.telemetry import get_telemetry
+import concurrent.futures as cf
+import itertools
 
 
 venues = [
@@ -47,68 +56,95 @@ fields = [
 conferences_name = "ConferencesData"
 
 
-def download_pdfs_pipeline(
-    notes, cache_folder, limit_names_and_urls=None, credentials_file=None
-):
-    processes = []
+def download_pdfs_pipeline(scrape_cache, limit_names_and_urls=None, max_workers=16):
+    # One downloader (shared session, host limits, store and manifest) and one
+    # scheduler interleaving every venue's jobs on max_workers threads
+    downloader = PDFDownloader(
+        download_folder=f"{PROJECT_ROOT_DIR}/{conferences_name}/",
+        timeout=60,
+        retry_attempts=5,
+        max_workers=max_workers,
+        max_per_host=4,
+        store=PDFStore(),
+        manifest=DownloadManifest(),
+    )
+    scheduler = DownloadScheduler(max_workers=max_workers)
     for venue_id in venues:
         safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
         logging.info(f"Safe venue ID: {safe_venue_id}")
         pdf_folder = f"{PROJECT_ROOT_DIR}/{conferences_name}/{safe_venue_id}/"
         logging.info(f"PDF folder: {pdf_folder}")
         logging.info(f"Downloading PDFs {venue_id}")
-        notes, table = scrape_conference(venue_id, credentials_file, cache_folder)
+        notes, table = scrape_cache.get(venue_id)
 
-        names_and_urls = openreview_utils.get_pdfs_names_and_urls(notes)
-        if limit_names_and_urls is not None:
-            names_and_urls = names_and_urls[:limit_names_and_urls]
+        names_and_urls = list(
+            itertools.islice(
+                openreview_utils.iter_pdfs_names_and_urls(notes), limit_names_and_urls
+            )
+        )
         urls = [url for _, _, url in names_and_urls]
         titles = [title for title, _, _ in names_and_urls]
 
-        # Create and start a new process for each venue
-        p = mp.Process(target=download_pdfs, args=(urls, pdf_folder, titles, venue_id))
-        p.start()
-        processes.append(p)
+        todo = downloader.pending(urls, titles, folder=pdf_folder)
+        logging.info(f"{venue_id}: {len(todo)} of {len(urls)} PDFs to download")
+        scheduler.add_jobs(
+            venue_id,
+            downloader.download_pdf,
+            [(urls[i], titles[i], venue_id, None, pdf_folder) for i in todo],
+        )
+
+    return scheduler.run()
 
-    # Wait for all processes to complete
-    for p in processes:
-        p.join()
+
+def validate_pdfs_pipeline(scrape_cache, limit_names_and_urls=None):
+    """Check every venue's PDFs in parallel and re-download the invalid ones."""
+    folders = [
+        f"{PROJECT_ROOT_DIR}/{conferences_name}/{openreview_utils.normalize_venue_id(venue_id)}/"
+        for venue_id in venues
+    ]
+    validator = PDFValidator(
+        f"{PROJECT_ROOT_DIR}/{conferences_name}/pdf_validation.json"
+    )
+    bad = validator.scan([folder for folder in folders if os.path.exists(folder)])
+    if not bad:
+        logging.info("All PDFs are valid")
+        return
+    validator.repair(bad, manifest=DownloadManifest(), store=PDFStore())
+    download_pdfs_pipeline(scrape_cache, limit_names_and_urls=limit_names_and_urls)
 
 
-def download_pdfs(pdf_urls, cache_folder, titles=None, additional_info=""):
+def download_pdfs(
+    pdf_urls, cache_folder, titles=None, additional_info="", store_folder=None
+):
 
     # Advanced usage with custom settings
     downloader = PDFDownloader(
         download_folder=cache_folder,
         timeout=60,
         retry_attempts=5,
-        delay_between_downloads=0.25,
+        max_workers=8,
+        max_per_host=4,
+        store=PDFStore(store_folder) if store_folder else None,
+        manifest=DownloadManifest(),
     )
     downloaded_files = downloader.download_pdfs(
         pdf_urls, titles, additional_info=additional_info
     )
 
 
-def scrape_conference(venue_id, credentials_file, cache_folder):
-    table = list()
+def conference_rows(notes):
+    """Yield one TSV row per note, with columns in `fields` order."""
     values_venue = set()
     counter = 0
-    notes_filtered = list()
-
-    notes = openreview_utils.get_conference(
-        credentials_file=credentials_file, venue_id=venue_id, cache_folder=cache_folder
-    )
-    # Open link to google drive and make a new sheet
-
-    # get first note and print its content fields
-    logging.info("\n" + str(notes[0].content.keys()))
     for i, note in enumerate(notes):
+        if counter == 0:
+            # get first note and print its content fields
+            logging.info("\n" + str(note.content.keys()))
         if "Bw9NHYjDqR" in note.id:
             logging.info(note.content)
         values_venue.add(note.content["venue"]["value"])
         logging.info(f"venue {i}: {note.content['venue']['value']}")
         line = list()
-        notes_filtered.append(note)
         counter += 1
         for field in fields:
             if field == "id":
@@ -131,61 +167,156 @@ def scrape_conference(venue_id, credentials_file, cache_folder):
                 line.append(value)
             else:
                 line.append("")
-        table.append("\t".join(line))
+        yield "\t".join(line)
     logging.info(f"Scraped valid papers: {counter}")
     logging.info("\n".join(list(values_venue)))
-    table = "\n".join(table)
+
+
+def scrape_conference(
+    venue_id, credentials_file, cache_folder, rate_limiter=None, incremental=False
+):
+    notes = openreview_utils.get_conference(
+        credentials_file=credentials_file,
+        venue_id=venue_id,
+        cache_folder=cache_folder,
+        rate_limiter=rate_limiter,
+        incremental=incremental,
+        columns=[field for field in fields if field != "id"],
+    )
+    table = "\n".join(conference_rows(notes))
     # if {conferences_name} folder does not exist, create it
-    if not os.path.exists(f"{PROJECT_ROOT_DIR}/{conferences_name}"):
-        os.makedirs(f"{PROJECT_ROOT_DIR}/{conferences_name}")
+    os.makedirs(f"{PROJECT_ROOT_DIR}/{conferences_name}", exist_ok=True)
 
-    return notes_filtered, table
+    return notes, table
+
+
+def stream_conference(
+    venue_id, credentials_file, cache_folder, rate_limiter=None, incremental=False
+):
+    """
+    Streaming variant of scrape_conference: rows go straight from the note
+    store cursor to the CSV file, so peak memory does not grow with venue size.
+    Returns a re-iterable view of the notes and no table.
+    """
+    notes = openreview_utils.get_conference_view(
+        credentials_file=credentials_file,
+        venue_id=venue_id,
+        cache_folder=cache_folder,
+        rate_limiter=rate_limiter,
+        incremental=incremental,
+        columns=[field for field in fields if field != "id"],
+    )
+    save_conference_rows(venue_id, conference_rows(notes))
+    return notes, None
+
+
+def save_conference_rows(venue_id, rows):
+    safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
+    os.makedirs(f"{PROJECT_ROOT_DIR}/{conferences_name}", exist_ok=True)
+    with open(f"{PROJECT_ROOT_DIR}/{conferences_name}/{safe_venue_id}.csv", "w") as f:
+        for i, row in enumerate(rows):
+            if i > 0:
+                f.write("\n")
+            f.write(row)
+
+
+def save_conference_table(venue_id, table):
+    safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
+    with open(f"{PROJECT_ROOT_DIR}/{conferences_name}/{safe_venue_id}.csv", "w") as f:
+        f.write(table)
 
 
 def scrape_conferences_pipeline(
-    limit_names_and_urls=10, download_pdfs=False, download_spotlight_videos=True
+    limit_names_and_urls=10,
+    download_pdfs=False,
+    download_spotlight_videos=True,
+    max_workers=1,
+    requests_per_second=None,
+    incremental=False,
+    max_cached_venues=None,
+    stream=False,
+    validate_pdfs=False,
+    extract_text=False,
 ):
-    openreview_utils.prepare_parameters_and_logging()
+    args = openreview_utils.prepare_parameters_and_logging()
     credentials_file = f"{PROJECT_ROOT_DIR}/credentials/openreview_api.txt"
     cache_folder = f"{PROJECT_ROOT_DIR}/{conferences_name}/"
+    rate_limiter = get_rate_limiter(requests_per_second)
+    # In stream mode the CSV is written while loading and stages share a
+    # lazy view of the note store instead of an in-memory list
+    load_conference = stream_conference if stream else scrape_conference
+    scrape_cache = ScrapeCache(
+        lambda venue_id: load_conference(
+            venue_id,
+            credentials_file,
+            cache_folder,
+            rate_limiter=rate_limiter,
+            incremental=incremental,
+        ),
+        max_venues=max_cached_venues,
+    )
 
-    for venue_id in venues:
-        safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
-        logging.info(f"Scraping {venue_id}")
-        notes, table = scrape_conference(venue_id, credentials_file, cache_folder)
+    if max_workers <= 1:
+        for venue_id in venues:
+            logging.info(f"Scraping {venue_id}")
+            notes, table = scrape_cache.get(venue_id)
+            if table is not None:
+                save_conference_table(venue_id, table)
+    else:
+        # Overlap venue downloads; each CSV is written as soon as its venue lands
+        logging.info(f"Scraping {len(venues)} venues with {max_workers} workers")
+        with cf.ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {
+                ex.submit(scrape_cache.get, venue_id): venue_id for venue_id in venues
+            }
+            for future in cf.as_completed(futures):
+                venue_id = futures[future]
+                notes, table = future.result()
+                logging.info(f"Scraped {venue_id}")
+                if table is not None:
+                    save_conference_table(venue_id, table)
 
-        # save table to file
-        safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
-        with open(
-            f"{PROJECT_ROOT_DIR}/{conferences_name}/{safe_venue_id}.csv", "w"
-        ) as f:
-            f.write(table)
+    telemetry = get_telemetry()
+    if download_pdfs or download_spotlight_videos:
+        # Rates are measured over the downloads, not the scraping before them
+        telemetry.reset()
+        telemetry.start_periodic(60)
 
     if download_pdfs:
         logging.info(f"Downloading PDFs {venues}")
-        download_pdfs_pipeline(
-            notes,
-            cache_folder,
-            limit_names_and_urls=limit_names_and_urls,
-            credentials_file=credentials_file,
-        )
+        download_pdfs_pipeline(scrape_cache, limit_names_and_urls=limit_names_and_urls)
+
+    if validate_pdfs:
+        logging.info(f"Validating PDFs {venues}")
+        validate_pdfs_pipeline(scrape_cache, limit_names_and_urls=limit_names_and_urls)
+
+    if extract_text:
+        # Incremental: only PDFs added to the store since the last run
+        logging.info("Extracting PDF text")
+        extract_store_texts()
 
     if download_spotlight_videos:
         logging.info(f"Downloading Spotlight Videos {venues}")
         download_spotlight_videos_pipeline(
             venues,
             conferences_name,
-            cache_folder,
+            scrape_cache,
             limit_names_and_urls=limit_names_and_urls,
-            credentials_file=credentials_file,
         )
 
+    if download_pdfs or download_spotlight_videos:
+        telemetry.stop()
+        telemetry.log_summary()
+        telemetry.write_report(f"./logs/download_telemetry_{args.signature}.json")
+
 
 def main():
     scrape_conferences_pipeline(
         download_pdfs=False,
         download_spotlight_videos=False,
         limit_names_and_urls=10000,
+        max_workers=len(venues),
+        requests_per_second=2,
     )
 
 
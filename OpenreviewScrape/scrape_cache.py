@@ -0,0 +1,42 @@
+import logging
+import threading
+from collections import OrderedDict
+
+
+class ScrapeCache:
+    """
+    Per-run memo of venue -> (notes, table), shared by the pipeline stages.
+
+    Scraping, PDF and video stages all need the same parsed notes; the first
+    stage to ask for a venue pays for loading it and the rest reuse it.
+    """
+
+    def __init__(self, loader, max_venues=None):
+        """
+        Args:
+            loader: Callable venue_id -> (notes, table)
+            max_venues: Keep at most this many venues in memory (None = no bound),
+                evicting the least recently used one
+        """
+        self.loader = loader
+        self.max_venues = max_venues
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, venue_id):
+        with self._lock:
+            if venue_id in self._entries:
+                self._entries.move_to_end(venue_id)
+                return self._entries[venue_id]
+        entry = self.loader(venue_id)
+        with self._lock:
+            self._entries[venue_id] = entry
+            self._entries.move_to_end(venue_id)
+            while self.max_venues is not None and len(self._entries) > self.max_venues:
+                evicted, _ = self._entries.popitem(last=False)
+                logging.info(f"Evicted {evicted} from scrape cache")
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,30 @@
+import os
+import sqlite3
+import threading
+
+
+class ThreadLocalConnection:
+    """
+    Callable returning an SQLite connection to `path` for the calling thread.
+
+    Each thread gets its own connection (in WAL mode), and a fresh one is
+    opened in a child process after a fork, since connections must not be
+    shared across either.
+    """
+
+    def __init__(self, path, timeout=30):
+        """
+        Args:
+            path: SQLite file to connect to
+            timeout: Seconds to wait on a locked database
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self):
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = sqlite3.connect(self.path, timeout=self.timeout)
+            self._local.conn.execute("PRAGMA journal_mode=WAL")
+            self._local.pid = os.getpid()
+        return self._local.conn
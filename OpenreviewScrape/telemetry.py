@@ -0,0 +1,162 @@
+import bisect
+import contextlib
+import json
+import logging
+import threading
+import time
+
+# Latency bucket upper bounds in seconds (last bucket is open-ended)
+LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram with count/sum/min/max."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (0 < q <= 100)."""
+        if self.count == 0:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + [self.max], self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": dict(
+                zip([str(bound) for bound in self.bounds] + ["inf"], self.counts)
+            ),
+        }
+
+
+class Telemetry:
+    """
+    Counters and latency histograms for the download subsystem.
+
+    Counters hold totals such as bytes, files and retries. Histograms hold
+    durations such as per-request latency and time spent in backoff or
+    waiting on the rate limiter. A background thread can log a periodic
+    summary, and write_report() dumps everything as JSON at the end of a run.
+    """
+
+    def __init__(self):
+        self.counters = dict()
+        self.histograms = dict()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def reset(self):
+        """Clear all counters and histograms and restart the clock."""
+        with self._lock:
+            self.counters = dict()
+            self.histograms = dict()
+            self.started = time.time()
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            if name not in self.histograms:
+                self.histograms[name] = Histogram()
+            self.histograms[name].observe(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start)
+
+    def summary(self):
+        with self._lock:
+            elapsed = time.time() - self.started
+            return {
+                "started": self.started,
+                "elapsed": elapsed,
+                "counters": dict(self.counters),
+                "rates": {
+                    name: value / elapsed
+                    for name, value in self.counters.items()
+                    if name.endswith(".bytes") and elapsed > 0
+                },
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in self.histograms.items()
+                },
+            }
+
+    def log_summary(self):
+        summary = self.summary()
+        logging.info(f"Telemetry after {summary['elapsed']:.0f}s:")
+        for name, value in sorted(summary["counters"].items()):
+            logging.info(f"\t{name}: {value}")
+        for name, rate in sorted(summary["rates"].items()):
+            logging.info(f"\t{name}/s: {rate / 1e6:.2f} MB/s")
+        for name, stats in sorted(summary["histograms"].items()):
+            logging.info(
+                f"\t{name}: n={stats['count']} mean={stats['mean']:.3f}s "
+                f"p50<={stats['p50']}s p95<={stats['p95']}s max={stats['max']:.3f}s"
+            )
+
+    def start_periodic(self, interval=60.0):
+        """Log a summary every `interval` seconds until stop() is called."""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                self.log_summary()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def write_report(self, path):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+        logging.info(f"Telemetry report written to {path}")
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry():
+    """Process-wide Telemetry instance shared by all downloaders."""
+    return _telemetry
@@ -0,0 +1,162 @@
+import concurrent.futures as cf
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from fractions import Fraction
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.sqlite_utils import ThreadLocalConnection
+
+DEFAULT_PROBE_CACHE_PATH = f"{PROJECT_ROOT_DIR}/ConferencesData/video_probes.sqlite"
+
+PROBE_FIELDS = [
+    "duration",
+    "video_codec",
+    "pix_fmt",
+    "width",
+    "height",
+    "fps",
+    "sar",
+    "audio_codec",
+    "sample_rate",
+    "channels",
+]
+
+
+def probe_video(path):
+    """
+    Duration, codecs and geometry of a video, read with ffprobe.
+
+    Returns:
+        {field: value} for every name in PROBE_FIELDS (None when absent)
+    """
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-show_entries",
+            "format=duration:stream=codec_type,codec_name,pix_fmt,width,height,"
+            "sample_aspect_ratio,avg_frame_rate,sample_rate,channels",
+            "-of", "json", str(path),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"ffprobe failed on {path}")
+    data = json.loads(result.stdout)
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    fps = video.get("avg_frame_rate")
+    try:
+        fps = float(Fraction(fps)) if fps else None
+    except (ValueError, ZeroDivisionError):
+        fps = None
+    duration = data.get("format", {}).get("duration")
+    return {
+        "duration": float(duration) if duration else None,
+        "video_codec": video.get("codec_name"),
+        "pix_fmt": video.get("pix_fmt"),
+        "width": video.get("width"),
+        "height": video.get("height"),
+        "fps": fps,
+        "sar": video.get("sample_aspect_ratio"),
+        "audio_codec": audio.get("codec_name"),
+        "sample_rate": int(audio["sample_rate"]) if audio.get("sample_rate") else None,
+        "channels": audio.get("channels"),
+    }
+
+
+class VideoProbeCache:
+    """
+    ffprobe results for downloaded videos, probed once per file version.
+
+    Rows are keyed by note id and remember the file's size and mtime; a
+    lookup re-probes only when the file has changed since it was probed.
+    """
+
+    def __init__(self, path: str = DEFAULT_PROBE_CACHE_PATH):
+        """
+        Args:
+            path: SQLite file holding the probe results (created if missing)
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = ThreadLocalConnection(self.path)
+        conn = self._conn()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(probes)")}
+        if columns and not set(PROBE_FIELDS) <= columns:
+            # Cache from an older field list: probe everything again
+            conn.execute("DROP TABLE probes")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "note_id TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime_ns INTEGER, "
+            "duration REAL, video_codec TEXT, pix_fmt TEXT, width INTEGER, "
+            "height INTEGER, fps REAL, sar TEXT, audio_codec TEXT, "
+            "sample_rate INTEGER, channels INTEGER, probed REAL)"
+        )
+        conn.commit()
+
+    @staticmethod
+    def note_id(path):
+        return os.path.splitext(os.path.basename(path))[0]
+
+    def get(self, path):
+        """Probe result for a video, probing it only if it is new or changed."""
+        stat = os.stat(path)
+        note_id = self.note_id(path)
+        row = (
+            self._conn()
+            .execute(
+                f"SELECT size, mtime_ns, {', '.join(PROBE_FIELDS)} FROM probes "
+                "WHERE note_id = ?",
+                (note_id,),
+            )
+            .fetchone()
+        )
+        if row is not None and tuple(row[:2]) == (stat.st_size, stat.st_mtime_ns):
+            return dict(zip(PROBE_FIELDS, row[2:]))
+        info = probe_video(path)
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO probes (note_id, path, size, mtime_ns, "
+            f"{', '.join(PROBE_FIELDS)}, probed) "
+            f"VALUES (?, ?, ?, ?, {', '.join('?' * len(PROBE_FIELDS))}, ?)",
+            (
+                note_id,
+                os.path.normpath(str(path)),
+                stat.st_size,
+                stat.st_mtime_ns,
+                *(info[field] for field in PROBE_FIELDS),
+                time.time(),
+            ),
+        )
+        conn.commit()
+        return info
+
+    def probe_all(self, paths, max_workers=8):
+        """
+        {path: probe result} for every video, probing new ones in parallel.
+        Videos ffprobe cannot read are logged and left out.
+        """
+        if shutil.which("ffprobe") is None:
+            logging.warning("ffprobe not found; video metadata is unavailable")
+            return dict()
+        results = dict()
+        with cf.ThreadPoolExecutor(max_workers=max_workers) as ex:
+            futures = {ex.submit(self.get, path): path for path in paths}
+            for future in cf.as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except (RuntimeError, ValueError, subprocess.TimeoutExpired) as e:
+                    logging.error(f"Could not probe {futures[future]}: {e}")
+        return results
+
+
+def total_duration(probes):
+    """Summed duration in seconds of the probed videos (unknown ones count as 0)."""
+    return sum(info["duration"] or 0.0 for info in probes.values())
@@ -1,118 +1,390 @@
+import concurrent.futures as cf
 import os
 import logging
+import shutil
+import subprocess
+import time
 import requests
-from tqdm import tqdm
+from requests.adapters import HTTPAdapter
 
 from OpenreviewScrape import openreview_utils
 from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+from OpenreviewScrape.download_manifest import DownloadManifest
+from OpenreviewScrape.download_scheduler import DownloadScheduler
+from OpenreviewScrape.http_download import UnexpectedContentError, download_to_path
+from OpenreviewScrape.rate_limit import get_rate_limiter, retry_after_seconds
+from OpenreviewScrape.telemetry import get_telemetry
+from OpenreviewScrape.video_probe import VideoProbeCache, total_duration
+
+REEL_WIDTH = 1920
+REEL_HEIGHT = 1080
+REEL_FPS = 30
 
 
 def download_spotlight_videos_pipeline(
     venues,
     conferences_name,
-    cache_folder,
+    scrape_cache,
     limit_names_and_urls=None,
-    credentials_file=None,
+    manifest=None,
+    max_workers=8,
+    compile_reel=True,
 ):
-    from OpenreviewScrape.run_pipeline import scrape_conference
-
+    manifest = manifest or DownloadManifest()
+    # One pooled session and one scheduler interleaving every venue's videos
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    scheduler = DownloadScheduler(max_workers=max_workers)
+    video_folders = list()
     for venue_id in venues:
         safe_venue_id = openreview_utils.normalize_venue_id(venue_id)
         video_folder = (
             f"{PROJECT_ROOT_DIR}/{conferences_name}/{safe_venue_id}_spotlight_videos/"
         )
+        video_folders.append(video_folder)
         # if folder does not exist, create it
         if not os.path.exists(video_folder):
             os.makedirs(video_folder)
-        logging.info(f"Downloading PDFs {venue_id}")
-        notes, _ = scrape_conference(venue_id, credentials_file, cache_folder)
+        logging.info(f"Downloading spotlight videos {venue_id}")
+        notes, _ = scrape_cache.get(venue_id)
+        # One query instead of an exists() call per video
+        done = manifest.completed_paths(kind="video", folder=video_folder)
 
+        jobs = list()
         for i, note in enumerate(notes):
             if limit_names_and_urls is not None and i >= limit_names_and_urls:
                 break
             if "spotlight" in note.content.keys():
-                logging.info(f"{note.content['spotlight']}")
                 extension = note.content["spotlight"]["value"].split(".")[-1]
-                title = openreview_utils.normalize_title(note.content["title"]["value"])
-                logging.info(
-                    f"Downloading spotlight video no. {i}\n\t{note.id}\n\t{title}"
-                )
                 # path = f"{video_folder}" + f"/{note.id}_{i}_{title}.mp4"
-                path = f"{video_folder}" + f"/{note.id}.{extension}"
-                if os.path.exists(path):
+                path = os.path.normpath(f"{video_folder}/{note.id}.{extension}")
+                if path in done:
                     continue
-                download_openreview_video(
-                    note.id,
-                    # f"spotlight_{note.id}_{i}_{title}.{extension}",
-                    f"{note.id}.{extension}",
-                    output_path=path,
-                )
-        create_script_for_concatenation(
-            video_folder, limit_names_and_urls=limit_names_and_urls
-        )
+                url = f"https://openreview.net/attachment?id={note.id}&name=spotlight"
+                if os.path.exists(path):
+                    # Downloaded before the manifest existed, possibly by the
+                    # old downloader that saved HTML/JSON error bodies as videos
+                    if _looks_like_video(path):
+                        manifest.record_success(
+                            path, url, "video", size=os.path.getsize(path)
+                        )
+                        continue
+                    logging.warning(f"Not a video, downloading again: {path}")
+                    os.remove(path)
+                jobs.append((note.id, path, session, manifest))
+        logging.info(f"{venue_id}: {len(jobs)} spotlight videos to download")
+        scheduler.add_jobs(venue_id, download_spotlight_video, jobs)
+
+    scheduler.run()
+    if compile_reel:
+        for video_folder in video_folders:
+            compile_spotlight_reel(
+                video_folder, limit_names_and_urls=limit_names_and_urls
+            )
 
 
-def create_script_for_concatenation(video_folder, limit_names_and_urls=10000000):
+def _looks_like_video(path):
+    """False for an empty file or a saved text error body (HTML, JSON)."""
+    with open(path, "rb") as f:
+        head = f.read(64).lstrip()
+    return bool(head) and head[:1] not in (b"<", b"{")
+
+
+def download_spotlight_video(note_id, path, session, manifest, retry_attempts=3):
     """
-    ffmpeg -i 0ViTEgiFiQ.mp4 -i Bw9NHYjDqR.mp4 \
-    -filter_complex "\
-  [0:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,fps=30[v0]; \
-  [1:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,fps=30[v1]; \
-  [v0][0:a][v1][1:a]concat=n=2:v=1:a=1[outv][outa]" \
-  -map "[outv]" -map "[outa]" -c:v libx264 -c:a aac output.mp4
+    Download one spotlight video, retrying (and resuming) failed transfers.
+
+    Returns:
+        path on success, None once every attempt failed (recorded in the manifest)
+    """
+    url = f"https://openreview.net/attachment?id={note_id}&name=spotlight"
+    telemetry = get_telemetry()
+    for attempt in range(retry_attempts):
+        try:
+            download_openreview_video(
+                note_id,
+                os.path.basename(path),
+                output_path=path,
+                session=session,
+                show_progress=False,
+            )
+            manifest.record_success(path, url, "video", size=os.path.getsize(path))
+            return path
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Attempt {attempt + 1} failed for video {url}: {e}")
+            response = getattr(e, "response", None)
+            telemetry.incr("video.errors")
+            if attempt < retry_attempts - 1:
+                telemetry.incr("video.retries")
+                # The rate limiter already backs off on 429
+                if response is None or response.status_code != 429:
+                    time.sleep(2**attempt)
+                    telemetry.observe("video.backoff", 2**attempt)
+                continue
+            telemetry.incr("video.failed")
+            manifest.record_failure(
+                path,
+                url,
+                "video",
+                http_status=response.status_code if response is not None else None,
+                error=str(e),
+            )
+            return None
+
+
+def _run_ffmpeg(args):
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip()[-2000:])
+
+
+def is_reel_video(probe):
+    """True if a probed clip's video stream already matches the reel format."""
+    return (
+        probe is not None
+        and probe["video_codec"] == "h264"
+        and probe["pix_fmt"] == "yuv420p"
+        and (probe["width"], probe["height"]) == (REEL_WIDTH, REEL_HEIGHT)
+        and probe["fps"] is not None
+        and abs(probe["fps"] - REEL_FPS) < 0.01
+        # Copied as is, a non-square pixel aspect ratio would be stretched
+        and probe["sar"] in ("1:1", "0:1")
+    )
+
+
+def is_reel_audio(probe):
+    """True if a probed clip's audio stream already matches the reel format."""
+    return (
+        probe is not None
+        and probe["audio_codec"] == "aac"
+        and probe["sample_rate"] == 48000
+        and probe["channels"] == 2
+    )
+
+
+def normalize_video(src, dst, threads=2, probe=None):
     """
-    s = list()
-    s.append(f"ffmpeg ")
-    # get all videos in video_folder
-    videos = [f for f in os.listdir(video_folder) if f.endswith(".mp4")]
-    for video in videos[:limit_names_and_urls]:
-        s.append(f"-i {video} ")
-    s.append(f"\\\n")
-    s.append(f'-filter_complex "\\\n')
-    for i, video in enumerate(videos[:limit_names_and_urls]):
-        s.append(
-            f"[{i}:v]scale=1920:1080:force_original_aspect_ratio=decrease,pad=1920:1080:(ow-iw)/2:(oh-ih)/2,setsar=1,fps=30[v{i}]; \\\n"
+    Re-encode one clip to 1920x1080, 30 fps, H.264/AAC so every clip shares
+    the same stream layout and can be joined without another re-encode.
+
+    The clip is written as MPEG-TS to a temporary file and renamed once
+    complete. A clip without an audio track gets a silent one. With a probe
+    result (see video_probe), streams already in the reel format are copied
+    instead of re-encoded. Copied and encoded clips may still differ in
+    H.264 profile, level and parameter sets; in MPEG-TS the SPS/PPS travel
+    in-band with each clip, so the joined reel decodes past every change.
+    """
+    tmp = f"{dst}.part"  # not *.mp4, so never mistaken for a clip
+    if is_reel_video(probe):
+        video_args = ["-c:v", "copy", "-bsf:v", "h264_mp4toannexb"]
+    else:
+        video_args = [
+            "-vf",
+            f"scale={REEL_WIDTH}:{REEL_HEIGHT}:force_original_aspect_ratio=decrease,"
+            f"pad={REEL_WIDTH}:{REEL_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={REEL_FPS}",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "20",
+            "-pix_fmt", "yuv420p",
+        ]
+    video_args += ["-threads", str(threads)]
+    if is_reel_audio(probe):
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_args = ["-c:a", "aac", "-ar", "48000", "-ac", "2"]
+    silent = [
+        "-i", src,
+        "-f", "lavfi", "-i", "anullsrc=r=48000:cl=stereo",
+        "-map", "0:v:0", "-map", "1:a:0", "-shortest",
+        *video_args, "-c:a", "aac", "-ar", "48000", "-ac", "2", "-f", "mpegts", tmp,
+    ]
+    if probe is not None and probe["audio_codec"] is None:
+        _run_ffmpeg(silent)
+    else:
+        try:
+            _run_ffmpeg(
+                [
+                    "-i", src, "-map", "0:v:0", "-map", "0:a:0",
+                    *video_args, *audio_args, "-f", "mpegts", tmp,
+                ]
+            )
+        except RuntimeError:
+            if probe is not None:
+                raise
+            # Most likely no audio stream: pad with silence
+            _run_ffmpeg(silent)
+    os.replace(tmp, dst)
+    return dst
+
+
+def compile_spotlight_reel(
+    video_folder, limit_names_and_urls=None, max_workers=None, threads_per_job=2
+):
+    """
+    Build <video_folder>/output.mp4 from every spotlight video in the folder.
+
+    1. Each clip is probed (cached) to report the reel's runtime, then
+       normalized (normalize_video) on a worker pool into normalized/*.ts;
+       clips already normalized since their last change are skipped, so an
+       interrupted build resumes where it stopped.
+    2. The normalized clips are joined with the concat demuxer (stream copy,
+       no re-encode) and remuxed into MP4.
+
+    Args:
+        video_folder: Folder holding the downloaded <note_id>.mp4 files
+        limit_names_and_urls: Only use the first N videos
+        max_workers: Parallel ffmpeg jobs (defaults to CPU count / threads_per_job)
+        threads_per_job: Encoder threads per ffmpeg job
+
+    Returns:
+        Path of the compiled reel, or None if there was nothing to compile
+    """
+    if shutil.which("ffmpeg") is None:
+        logging.warning("ffmpeg not found; skipping spotlight reel compilation")
+        return None
+    # Leave out the reel itself and temporary files of an interrupted build
+    videos = sorted(
+        f
+        for f in os.listdir(video_folder)
+        if f.endswith(".mp4") and f != "output.mp4" and ".part" not in f
+    )[:limit_names_and_urls]
+    if not videos:
+        return None
+    normalized_folder = os.path.join(video_folder, "normalized")
+    os.makedirs(normalized_folder, exist_ok=True)
+    max_workers = max_workers or max(1, (os.cpu_count() or 1) // threads_per_job)
+
+    # Probe every source once (cached by note id, size and mtime)
+    probes = VideoProbeCache().probe_all(
+        [os.path.join(video_folder, video) for video in videos]
+    )
+    if probes:
+        runtime = int(total_duration(probes))
+        logging.info(
+            f"Reel runtime: {runtime // 3600}:{runtime // 60 % 60:02d}:{runtime % 60:02d} "
+            f"over {len(probes)} clips"
         )
-    for i, video in enumerate(videos[:limit_names_and_urls]):
-        s.append(f"[v{i}][{i}:a]")
 
-    s.append(f'concat=n={len(videos[:limit_names_and_urls])}:v=1:a=1[outv][outa]" \\')
-    s.append(
-        f'-map "[outv]" -map "[outa]" -c:v libx264 -c:a aac {video_folder}/output.mp4 \n'
+    todo = list()
+    clips = list()
+    for video in videos:
+        src = os.path.join(video_folder, video)
+        dst = os.path.join(normalized_folder, os.path.splitext(video)[0] + ".ts")
+        clips.append(dst)
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            continue
+        todo.append((src, dst))
+    copied = sum(is_reel_video(probes.get(src)) for src, _ in todo)
+    logging.info(
+        f"Normalizing {len(todo)} of {len(videos)} clips with {max_workers} ffmpeg jobs "
+        f"({copied} already 1080p30, stream-copied)"
     )
-    # save s into a file
-    with open(f"{video_folder}/command.sh", "w") as f:
-        f.write("".join(s))
+
+    failed = set()
+    with cf.ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {
+            ex.submit(
+                normalize_video, src, dst, threads_per_job, probes.get(src)
+            ): dst
+            for src, dst in todo
+        }
+        for i, future in enumerate(cf.as_completed(futures), 1):
+            try:
+                future.result()
+            except RuntimeError as e:
+                logging.error(f"Could not normalize {futures[future]}: {e}")
+                failed.add(futures[future])
+            if i % 50 == 0:
+                logging.info(f"Normalized {i}/{len(todo)} clips")
+
+    clips = [clip for clip in clips if clip not in failed]
+    if not clips:
+        return None
+    output = os.path.join(video_folder, "output.mp4")
+    if os.path.exists(output) and os.path.getmtime(output) >= max(
+        os.path.getmtime(clip) for clip in clips
+    ):
+        logging.info(f"{output} is up to date")
+        return output
+    list_path = os.path.join(video_folder, "concat.txt")
+    with open(list_path, "w") as f:
+        for clip in clips:
+            f.write(f"file '{os.path.abspath(clip)}'\n")
+    _run_ffmpeg(
+        ["-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy",
+         "-bsf:a", "aac_adtstoasc", "-movflags", "+faststart", "-f", "mp4",
+         f"{output}.part"]
+    )
+    os.replace(f"{output}.part", output)
+    logging.info(f"Compiled {len(clips)} clips into {output}")
+    return output
+
+
+def _check_video(response):
+    # A failed request must not end up saved as an .mp4
+    content_type = response.headers.get("content-type", "").lower()
+    if content_type.startswith(("text/", "application/json")):
+        raise UnexpectedContentError(
+            f"Expected a video but got {content_type}", response=response
+        )
 
 
-def download_openreview_video(paper_id, filename, output_path=None):
+def download_openreview_video(
+    paper_id,
+    filename,
+    output_path=None,
+    session=None,
+    timeout=60,
+    chunk_size=1 << 20,
+    show_progress=True,
+):
     """
     Download a video from OpenReview
 
+    The video is written to "<output_path>.part" and renamed once complete;
+    an existing .part file is resumed with a Range request.
+
     Args:
         paper_id: OpenReview paper ID
         filename: Name of the attachment
         output_path: Optional custom output filename
+        session: requests.Session to reuse (defaults to the requests module)
+        timeout: Request timeout in seconds
+        chunk_size: Bytes per buffered write
+        show_progress: Show a tqdm progress bar
+
+    Returns:
+        Number of bytes transferred
     """
     url = f"https://openreview.net/attachment?id={paper_id}&name=spotlight"
 
     if output_path is None:
         output_path = filename
 
-    # Get file size for progress bar
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get("content-length", 0))
-
-    # Download with progress bar
-    with open(output_path, "wb") as f, tqdm(
-        desc=output_path,
-        total=total_size,
-        unit="B",
-        unit_scale=True,
-        unit_divisor=1024,
-    ) as bar:
-        for chunk in response.iter_content(chunk_size=8192):
-            size = f.write(chunk)
-            bar.update(size)
+    telemetry = get_telemetry()
+    rate_limiter = get_rate_limiter()
+    rate_limiter.wait()
+    try:
+        with telemetry.timer("video.latency"):
+            transferred = download_to_path(
+                session if session is not None else requests,
+                url,
+                output_path,
+                timeout=timeout,
+                chunk_size=chunk_size,
+                show_progress=show_progress,
+                check_response=_check_video,
+            )
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 429:
+            rate_limiter.throttled(retry_after_seconds(e.response))
+        raise
+    rate_limiter.succeeded()
 
+    telemetry.incr("video.bytes", transferred)
+    telemetry.incr("video.downloaded")
     logging.info(f"✓ Downloaded: {output_path}")
+    return transferred
@@ -13,11 +13,13 @@ import sys
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from normalize_keywords import normalize, load_keyword_counts, build_groups
+import citations_journal
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 DEFAULT_CONF = "ICML 2026"   # pre-selected conference filter
 DEFAULT_SORT = "infl"        # new | cites | infl
+USE_FUZZY = os.environ.get("S2_USE_FUZZY", "1") != "0"  # S2_USE_FUZZY=0: exact matches only
 
 TOPICS = [
     # (key, label, icon, regex over title+keywords+tldr)
@@ -48,14 +50,31 @@ def canonical_keywords():
     return {norm: variants[0][0] for norm, variants in groups.items()}
 
 
-def load_citations():
-    """normalized title -> (citations, influential), from fetch_citations.py's cache."""
-    path = os.path.join(ROOT, "ConferencesData", "citations_s2.json")
-    if not os.path.exists(path):
-        return {}
-    with open(path) as f:
-        return {k: (v["cites"], v.get("influential"))
-                for k, v in json.load(f).items() if v.get("cites") is not None}
+def load_citations(fuzzy=USE_FUZZY):
+    """
+    normalized title -> (citations, influential), from fetch_citations.py's journal.
+    High-confidence fuzzy title matches (see title_match.py) are included
+    unless `fuzzy` is off.
+    """
+    citations = {}
+    for k, v in citations_journal.load().items():
+        if not v:
+            continue
+        if v.get("fuzzy"):  # legacy fuzzy entries have no candidate: skipped
+            if fuzzy and v.get("candidate"):
+                citations[k] = (v["candidate"]["cites"], v["candidate"].get("influential"))
+        elif v.get("cites") is not None:
+            citations[k] = (v["cites"], v.get("influential"))
+    return citations
+
+
+CONF_MONTH = {"ICLR": 4, "ICML": 7, "CoRL": 11, "NeurIPS": 12}
+
+
+def conf_recency(conf):
+    """Sort key, newest first: by year, then by when the conference happens within a year."""
+    name, year = conf.split()
+    return int(year), CONF_MONTH.get(name, 0)
 
 
 def load_papers():
@@ -81,12 +100,7 @@ def load_papers():
                 cites, infl = citations.get(re.sub(r"[^a-z0-9]", "", p["title"].lower()), (None, None))
                 papers.append([conf, p["title"], p["authors"], p["keywords"], p["venue"],
                                p["pdf"], p["forum"], p["tldr"], p["abstract"], topics, cites, infl])
-    # newest first: by year, then by when the conference happens within a year
-    conf_month = {"ICLR": 4, "ICML": 7, "CoRL": 11, "NeurIPS": 12}
-    def recency(conf):
-        name, year = conf.split()
-        return int(year), conf_month.get(name, 0)
-    papers.sort(key=lambda p: recency(p[0]), reverse=True)
+    papers.sort(key=lambda p: conf_recency(p[0]), reverse=True)
     return conferences, papers
 
 
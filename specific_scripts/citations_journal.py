@@ -0,0 +1,89 @@
+"""Append-only journal backing the Semantic Scholar citations cache.
+
+ConferencesData/citations_s2.jsonl holds one {"k": normalized title,
+"v": entry} line per fetch result; when a title appears more than once the
+last line wins. Each result is persisted in O(1), with one appended and
+flushed line, so a crash loses at most the line being written. A torn last
+line is skipped when the journal is loaded. Superseded lines are dropped
+by compact(), which rewrites the file atomically. It runs whenever the
+journal has grown to twice its live size.
+
+The legacy citations_s2.json is migrated on first use.
+"""
+
+import json
+import os
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOURNAL = os.path.join(ROOT, "ConferencesData", "citations_s2.jsonl")
+LEGACY = os.path.join(ROOT, "ConferencesData", "citations_s2.json")
+
+
+def load(path=JOURNAL):
+    """normalized title -> entry, replaying the journal (last line wins)."""
+    if not os.path.exists(path):
+        if path == JOURNAL and os.path.exists(LEGACY):
+            with open(LEGACY) as f:
+                return json.load(f)
+        return {}
+    cache = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:  # torn write from a crash
+                continue
+            cache[rec["k"]] = rec["v"]
+    return cache
+
+
+class CitationsJournal:
+    def __init__(self, path=JOURNAL):
+        self.path = path
+        self.cache = load(path)
+        self.lock = threading.Lock()
+        self.f = None
+        if not os.path.exists(path):
+            self.lines = 0
+            self.compact()  # creates the journal (migrating the legacy json)
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            self.lines = data.count(b"\n")
+            self.f = open(path, "a")
+            if data and not data.endswith(b"\n"):
+                self.compact()  # drop the torn line before appending after it
+            else:
+                self.maybe_compact()
+
+    def put(self, key, entry):
+        with self.lock:
+            self.cache[key] = entry
+            self.f.write(json.dumps({"k": key, "v": entry}) + "\n")
+            self.f.flush()
+            self.lines += 1
+
+    def maybe_compact(self):
+        if self.lines > 2 * len(self.cache) + 1000:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the journal with one line per live entry (atomic rename)."""
+        with self.lock:
+            if self.f:
+                self.f.close()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                for k, v in self.cache.items():
+                    f.write(json.dumps({"k": k, "v": v}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.lines = len(self.cache)
+            self.f = open(self.path, "a")
+
+    def close(self):
+        self.maybe_compact()
+        self.f.close()
@@ -3,6 +3,9 @@
 For every (topic, conference) pair, sort that group's papers by
 influentialCitationCount (desc) and download the top 20 PDFs into
 pdfs/<topic>_<conference>/ via the authenticated OpenReview client.
+Each PDF is kept once in the shared content-addressed PDF store; the
+topic folders hold links into it, so papers already fetched by the
+pipeline or another topic aren't downloaded again.
 
     uv run python specific_scripts/download_top_pdfs.py          # download
     uv run python specific_scripts/download_top_pdfs.py --dry    # just counts
@@ -11,33 +14,32 @@ Papers without a note id (older hash-only CSVs) can't be fetched and are
 reported as skips. Existing files are skipped, so reruns resume.
 """
 
+import logging
 import os
 import re
 import sys
-import time
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from build_all_conferences_filter import ROOT, TOPICS, load_papers
 
-sys.path.insert(0, os.path.join(ROOT, "OpenreviewScrape"))
-import openreview_utils
+sys.path.insert(0, ROOT)
+from OpenreviewScrape import openreview_utils
+from OpenreviewScrape.pdf_store import PDFStore
+from OpenreviewScrape.telemetry import get_telemetry
 
 CREDS = os.path.join(ROOT, "credentials", "openreview_api.txt")
 PDFS = os.path.join(ROOT, "pdfs")
 TOP_N = 5
 DRY = "--dry" in sys.argv
 
-_client = [None]
-
-
 def get_pdf(note_id):
-    if _client[0] is None:
-        _client[0] = openreview_utils.get_client(CREDS)
-    try:
-        return _client[0].get_pdf(note_id)
-    except Exception:
-        _client[0] = openreview_utils.get_client(CREDS)  # refresh expired token
-        return _client[0].get_pdf(note_id)
+    # pooled client refreshes tokens before expiry; calls share the global rate limit
+    pool = openreview_utils.get_client_pool(CREDS)
+    telemetry = get_telemetry()
+    with telemetry.timer("top_pdf.latency"):
+        data = pool.call(lambda client: client.get_pdf(note_id))
+    telemetry.incr("top_pdf.bytes", len(data))
+    return data
 
 
 def safe(s, n=90):
@@ -54,7 +56,12 @@ def main():
     topic_label = {key: label for key, label, _, _ in TOPICS}
     confs = sorted({p[0] for p in papers})
 
-    total_dl = total_skip_noid = total_exist = total_fail = 0
+    store = PDFStore()
+    telemetry = get_telemetry()
+    if not DRY:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        telemetry.start_periodic(60)
+    total_dl = total_skip_noid = total_exist = total_linked = total_fail = 0
     for key in topic_label:
         for conf in confs:
             group = [p for p in papers if key in p[9] and p[0] == conf]
@@ -78,16 +85,22 @@ def main():
                 if not nid:
                     total_skip_noid += 1
                     continue
+                if store.link(nid, path):
+                    total_linked += 1
+                    continue
                 try:
-                    data = get_pdf(nid)
-                    with open(path, "wb") as f:
-                        f.write(data)
+                    store.add_bytes(nid, get_pdf(nid))
+                    store.link(nid, path)
                     total_dl += 1
-                    time.sleep(0.3)  # ponytail: be polite to OpenReview
                 except Exception as e:
                     total_fail += 1
+                    get_telemetry().incr("top_pdf.failed")
                     print(f"  FAIL {nid}: {e}")
-    print(f"\ndownloaded {total_dl}, existing {total_exist}, "
+    telemetry.stop()
+    if not DRY:
+        telemetry.log_summary()
+        telemetry.write_report(os.path.join(PDFS, "download_telemetry.json"))
+    print(f"\ndownloaded {total_dl}, linked from store {total_linked}, existing {total_exist}, "
           f"no-id skips {total_skip_noid}, failures {total_fail}")
 
 
@@ -1,16 +1,40 @@
-"""Fetch citation counts from Semantic Scholar for topic-tagged papers.
+"""Fetch citation counts from Semantic Scholar for all scraped papers.
 
-Uses the title-match endpoint (free, no key). Accepts a result only when
-normalized titles match exactly. Stores citationCount and
-influentialCitationCount, cached to ConferencesData/citations_s2.json so
-reruns only fetch new papers. Rerun to refresh after new conferences.
+Uses the title-match endpoint (free, no key). Accepts a result when the
+normalized titles match exactly. A result whose character-trigram
+similarity reaches S2_FUZZY_THRESHOLD (default 0.95) with the same words
+up to one change (see title_match.py) is kept as a fuzzy match: its counts
+stay under "candidate" with "cites" left null. The HTML viewer counts them
+unless S2_USE_FUZZY=0. Rejected candidates are kept the same way
+without the "fuzzy" score. After each run they are re-checked offline
+against every still-unmatched title with a MinHash/LSH index, which
+recovers near-misses without extra API calls. Stores citationCount and
+influentialCitationCount, journaled to ConferencesData/citations_s2.jsonl
+(see citations_journal.py; each result is appended as it arrives).
 
-ponytail: low concurrency + delay to stay under S2's shared rate limit;
-add an API key (x-api-key header) if you need it faster.
+Each entry is stamped with its fetch time. Counts go stale after
+S2_TTL_DAYS (default 14), and unmatched titles are retried after
+S2_MISS_TTL_DAYS (default 7). Each run refreshes stale and missing entries
+within S2_BUDGET requests (default 3000). Recent conferences go first, then
+topic-tagged papers, then highly cited ones. Matched entries keep their S2
+paperId, so titles are resolved only once. Their counts are refreshed
+through the multi-paper batch endpoint (up to 500 ids per request), so a
+full refresh is a few dozen requests instead of one per title.
+
+    uv run python specific_scripts/fetch_citations.py            # stale + new
+    uv run python specific_scripts/fetch_citations.py --refresh  # ignore TTLs
+
+S2_API overrides the API base (e.g. http://localhost:8001 for a local
+stand-in server); S2_API_KEY is sent as the x-api-key header.
+
+Requests in flight adapt to S2's throttling: additive increase on success,
+halved on 429 or 5xx with a pause honouring Retry-After (S2_MAX_CONCURRENCY caps
+it, default 16). The achieved request rate is printed with the progress.
+
+ponytail: set S2_API_KEY if the shared unauthenticated limit is too slow.
 """
 
 import concurrent.futures as cf
-import json
 import os
 import re
 import sys
@@ -19,57 +43,201 @@ import time
 import requests
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from build_all_conferences_filter import ROOT, load_papers
+from build_all_conferences_filter import ROOT, conf_recency, load_papers
+from citations_journal import CitationsJournal
+from title_match import MinHashIndex, is_match
+
+sys.path.insert(0, ROOT)
+from OpenreviewScrape.rate_limit import AdaptiveConcurrency, retry_after_seconds
 
-CACHE = os.path.join(ROOT, "ConferencesData", "citations_s2.json")
-MATCH_URL = "https://api.semanticscholar.org/graph/v1/paper/search/match"
+S2_API = os.environ.get("S2_API", "https://api.semanticscholar.org/graph/v1").rstrip("/")
+MATCH_URL = f"{S2_API}/paper/search/match"
+BATCH_URL = f"{S2_API}/paper/batch"
+BATCH_SIZE = 500  # S2's limit on ids per batch request
 FIELDS = "title,citationCount,influentialCitationCount,paperId"
+HEADERS = {"x-api-key": os.environ["S2_API_KEY"]} if os.environ.get("S2_API_KEY") else {}
+REFRESH = "--refresh" in sys.argv  # treat every entry as stale
+DAY = 86400
+TTL = float(os.environ.get("S2_TTL_DAYS", 14)) * DAY  # matched counts go stale after this
+MISS_TTL = float(os.environ.get("S2_MISS_TTL_DAYS", 7)) * DAY  # retry unmatched titles
+BUDGET = int(os.environ.get("S2_BUDGET", 3000))  # max S2 requests per run
+FUZZY_THRESHOLD = float(os.environ.get("S2_FUZZY_THRESHOLD", 0.95))  # trigram Jaccard
+# in-flight S2 requests adapt to throttling (AIMD) instead of a fixed pool + sleeps
+CTL = AdaptiveConcurrency(initial=2, max_limit=int(os.environ.get("S2_MAX_CONCURRENCY", 16)))
 
 
 def norm_title(t):
     return re.sub(r"[^a-z0-9]", "", t.lower())
 
 
-def fetch_one(title):
-    for attempt in range(6):
+def s2_request(method, url, attempts=8, **kw):
+    """Issue one S2 call under the AIMD controller; None after repeated failures."""
+    for attempt in range(attempts):
         try:
-            r = requests.get(MATCH_URL, params={"query": title, "fields": FIELDS}, timeout=30)
-            if r.status_code == 429:
-                time.sleep(2 + 2 ** attempt)
+            with CTL.slot():
+                r = requests.request(method, url, headers=HEADERS, **kw)
+            # 429 and 5xx mean S2 is overloaded: halve concurrency and pause
+            if r.status_code == 429 or r.status_code >= 500:
+                CTL.throttled(retry_after_seconds(r))
                 continue
-            if r.status_code == 404:  # S2 found no title match
-                return {"cites": None}
-            r.raise_for_status()
-            data = r.json().get("data") or []
-            if data and norm_title(data[0].get("title") or "") == norm_title(title):
-                return {"cites": data[0]["citationCount"],
-                        "influential": data[0]["influentialCitationCount"],
-                        "id": data[0]["paperId"]}
-            return {"cites": None}
+            if r.ok or r.status_code == 404:  # 404: no title match
+                CTL.succeeded()
+            return r
         except requests.RequestException:
             time.sleep(2 ** attempt)
-    return None  # transient failure; retry on next run
+    return None
+
+
+def fetch_one(title):
+    try:
+        r = s2_request("GET", MATCH_URL, params={"query": title, "fields": FIELDS}, timeout=30)
+        if r is None:
+            return None  # transient failure; retry on next run
+        if r.status_code == 404:  # S2 found no title match
+            return {"cites": None, "fetched": time.time()}
+        r.raise_for_status()
+    except requests.RequestException:
+        return None
+    data = r.json().get("data") or []
+    if not data:
+        return {"cites": None, "fetched": time.time()}
+    d = data[0]
+    entry = {"cites": d["citationCount"], "influential": d["influentialCitationCount"],
+             "id": d["paperId"], "fetched": time.time()}
+    if norm_title(d.get("title") or "") == norm_title(title):
+        return entry
+    # not an exact match: keep the candidate apart from "cites"; recover()
+    # re-checks rejected ones offline
+    miss = {"cites": None, "fetched": entry["fetched"],
+            "candidate": {**entry, "title": d.get("title") or ""}}
+    matched, score = is_match(d.get("title") or "", title, FUZZY_THRESHOLD)
+    return {**miss, "fuzzy": round(score, 3)} if matched else miss
+
+
+def fetch_batch(ids):
+    """paperId -> counts for up to BATCH_SIZE ids in one request (None on failure)."""
+    try:
+        r = s2_request("POST", BATCH_URL, params={"fields": FIELDS}, json={"ids": ids}, timeout=60)
+        if r is None:
+            return None
+        r.raise_for_status()
+    except requests.RequestException:
+        return None
+    # one result per requested id, in order; null for unknown ids
+    return {pid: {"cites": d["citationCount"], "influential": d["influentialCitationCount"],
+                  "id": pid, "fetched": time.time()}
+            for pid, d in zip(ids, r.json()) if d}
+
+
+def refresh(journal, keys):
+    """Re-count the given resolved papers via the batch endpoint; returns #updated."""
+    by_id = {journal.cache[k]["id"]: k for k in keys}
+    ids = list(by_id)
+    batches = [ids[i:i + BATCH_SIZE] for i in range(0, len(ids), BATCH_SIZE)]
+    updated = 0
+    with cf.ThreadPoolExecutor(max_workers=CTL.max_limit) as ex:
+        for i, res in enumerate(ex.map(fetch_batch, batches)):
+            if res is None:
+                print(f"batch {i} failed; keeping old counts", flush=True)
+                continue
+            for pid, entry in res.items():
+                journal.put(by_id[pid], entry)
+            updated += len(res)
+            print(f"refreshed {min((i + 1) * BATCH_SIZE, len(ids))}/{len(ids)}", flush=True)
+    return updated
+
+
+def recover(journal, papers):
+    """
+    Re-check stored candidates against every still-unmatched title with the
+    MinHash index: no API calls. A candidate fetched for one title may also
+    be a near-miss of another (e.g. a renamed version). Recovered entries
+    are fuzzy matches, stored like fetch_one's.
+    """
+    cache = journal.cache
+
+    def unmatched(key):
+        entry = cache.get(key) or {}
+        return entry.get("cites") is None and not entry.get("fuzzy")
+
+    index = MinHashIndex(threshold=FUZZY_THRESHOLD)
+    for p in papers:
+        key = norm_title(p[1])
+        if unmatched(key):
+            index.add(key, p[1])
+    recovered = 0
+    for entry in list(cache.values()):
+        cand = (entry or {}).get("candidate")
+        if not cand:
+            continue
+        key, score = index.query(cand["title"])
+        if key is None or not unmatched(key):
+            continue
+        journal.put(key, {"cites": None, "fetched": cand["fetched"], "candidate": cand,
+                          "fuzzy": round(score, 3)})
+        recovered += 1
+    return recovered
+
+
+def is_stale(entry, now):
+    if not entry:
+        return True
+    if entry.get("fuzzy") and entry.get("cites") is not None:
+        return True  # accepted under the old, looser rule: match it again
+    ttl = MISS_TTL if entry.get("cites") is None and not entry.get("fuzzy") else TTL
+    return REFRESH or now - entry.get("fetched", 0) >= ttl  # legacy entries: no stamp
+
+
+def plan(papers, cache, budget, now):
+    """
+    Pick stale entries within a request budget, best first: recent
+    conferences, then topic-tagged, then highly cited papers. Unresolved
+    titles cost one match request each; resolved ones share batch requests.
+    Returns (titles to match, cache keys to batch-refresh).
+    """
+    ranked = sorted(papers, key=lambda p: (conf_recency(p[0]), bool(p[9]), p[10] or -1),
+                    reverse=True)
+    match, batch, seen, cost = [], [], set(), 0.0
+    for p in ranked:
+        key = norm_title(p[1])
+        if key in seen or not is_stale(cache.get(key), now):
+            continue
+        seen.add(key)
+        resolved = bool((cache.get(key) or {}).get("id"))
+        cost += 1 / BATCH_SIZE if resolved else 1
+        if cost > budget:
+            break
+        (batch if resolved else match).append(key if resolved else p[1])
+    return match, batch
 
 
 def main():
     _, papers = load_papers()
-    titles = [p[1] for p in papers if p[9]]  # topic-tagged = short-viewer set
-    cache = json.load(open(CACHE)) if os.path.exists(CACHE) else {}
-    todo = [t for t in titles if norm_title(t) not in cache]
-    print(f"{len(titles)} tagged papers, {len(todo)} to fetch", flush=True)
+    journal = CitationsJournal()
+    cache = journal.cache
+    todo, stale_keys = plan(papers, cache, BUDGET, time.time())
+    print(f"{len(papers)} papers: {len(todo)} titles to match, "
+          f"{len(stale_keys)} stale counts to refresh (budget {BUDGET} requests)", flush=True)
 
     done = 0
-    with cf.ThreadPoolExecutor(max_workers=2) as ex:
+    # threads only wait on the controller, which decides how many are in flight
+    with cf.ThreadPoolExecutor(max_workers=CTL.max_limit) as ex:
         for title, res in zip(todo, ex.map(fetch_one, todo)):
             done += 1
             if res is not None:
-                cache[norm_title(title)] = res
+                journal.put(norm_title(title), res)
             if done % 200 == 0:
-                json.dump(cache, open(CACHE, "w"))
-                print(f"{done}/{len(todo)}", flush=True)
-    json.dump(cache, open(CACHE, "w"))
-    matched = sum(1 for t in titles if cache.get(norm_title(t), {}).get("cites") is not None)
-    print(f"done: {matched}/{len(titles)} papers matched on Semantic Scholar", flush=True)
+                print(f"{done}/{len(todo)} ({CTL.report()})", flush=True)
+    if stale_keys:
+        print(f"refreshed {refresh(journal, stale_keys)} papers via {BATCH_URL}", flush=True)
+    print(f"recovered {recover(journal, papers)} near-miss titles locally", flush=True)
+    journal.close()
+    print(f"S2: {CTL.report()}", flush=True)
+    keys = {norm_title(p[1]) for p in papers}
+    matched = sum(1 for k in keys if (cache.get(k) or {}).get("cites") is not None)
+    fuzzy = sum(1 for k in keys if (cache.get(k) or {}).get("fuzzy"))
+    print(f"done: {matched}/{len(keys)} papers matched on Semantic Scholar "
+          f"(+{fuzzy} fuzzy)", flush=True)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ OpenReview now gates PDF URLs behind a bot challenge anyway. This serves
 htmls/ over http and proxies /dl?id=<note_id>&n=<name> using the
 authenticated OpenReview client (get_pdf), returning the bytes with an
 attachment disposition so the download button saves instead of opening.
+PDFs are served from the shared content-addressed PDF store or the packed
+shard archive when present, and fetched ones are added to the store.
 
     uv run python specific_scripts/serve_conferences.py
     # then open http://localhost:8000/all_conferences_filter_short.html
@@ -15,25 +17,31 @@ import os
 import sys
 import urllib.parse
 
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "OpenreviewScrape"))
-import openreview_utils
-
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from OpenreviewScrape import openreview_utils
+from OpenreviewScrape.pdf_store import PDFStore
+
 HTMLS = os.path.join(ROOT, "htmls")
 CREDS = os.path.join(ROOT, "credentials", "openreview_api.txt")
 PORT = 8000
 
-client = openreview_utils.get_client(CREDS)
+pool = openreview_utils.get_client_pool(CREDS)
+store = PDFStore()  # reads pruned blobs from the shard archive when present
 
 
 def get_pdf_reauth(note_id):
-    """get_pdf, re-logging in once if the cached token has expired."""
-    global client
-    try:
-        return client.get_pdf(note_id)
-    except Exception:
-        client = openreview_utils.get_client(CREDS)  # token expires periodically; refresh
-        return client.get_pdf(note_id)
+    """get_pdf on a pooled client; the pool refreshes tokens before they expire."""
+    return pool.call(lambda client: client.get_pdf(note_id))
+
+
+def get_pdf_cached(note_id):
+    """PDF bytes from the store (or its archive), fetching and storing them on a miss."""
+    data = store.read_bytes(note_id)
+    if data is None:
+        data = get_pdf_reauth(note_id)
+        store.add_bytes(note_id, data)
+    return data
 
 
 class Handler(http.server.SimpleHTTPRequestHandler):
@@ -53,7 +61,7 @@ class Handler(http.server.SimpleHTTPRequestHandler):
             self.send_error(400, "missing note id")
             return
         try:
-            data = get_pdf_reauth(note_id)
+            data = get_pdf_cached(note_id)
         except Exception as e:
             self.send_error(502, f"fetch failed: {e}")
             return
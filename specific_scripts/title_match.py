@@ -0,0 +1,102 @@
+"""Fuzzy paper-title matching with character n-grams and MinHash/LSH.
+
+Titles that differ only in LaTeX markup, punctuation, or small edits
+between versions have nearly the same set of character trigrams.
+MinHashIndex finds candidates through banded MinHash signatures (LSH) and
+confirms them with the exact Jaccard similarity of the trigram sets, so a
+query touches only a handful of titles instead of all of them.
+
+A high trigram score alone is not enough: inserting a short word ("are
+Not Zero-Shot Reasoners") barely moves it. is_match() also requires the
+titles to have the same number of words with at most one word changed.
+"""
+
+import random
+import re
+import zlib
+from collections import Counter
+
+_PRIME = (1 << 61) - 1
+# Formatting commands carry no words; other commands (\alpha, \ell) do
+_FORMATTING = r"emph|text\w*|math(?:rm|bf|it|cal|bb|sf|tt)|operatorname|boldsymbol|bm"
+
+
+def clean_title(t):
+    t = re.sub(rf"\\(?:{_FORMATTING})\b", " ", t)
+    t = re.sub(r"\\([a-zA-Z]+)", r" \1 ", t)  # $\alpha$ -> alpha
+    t = re.sub(r"[^a-z0-9]+", " ", t.lower())
+    return " ".join(t.split())
+
+
+def shingles(t, n=3):
+    t = clean_title(t)
+    return {t[i:i + n] for i in range(max(1, len(t) - n + 1))} if t else set()
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def similarity(t1, t2):
+    """Jaccard similarity of the two titles' character trigrams (0..1)."""
+    return jaccard(shingles(t1), shingles(t2))
+
+
+def same_words(t1, t2):
+    """Same number of words, with at most one of them changed (e.g. a typo)."""
+    w1, w2 = Counter(clean_title(t1).split()), Counter(clean_title(t2).split())
+    return sum(w1.values()) == sum(w2.values()) and sum((w1 - w2).values()) <= 1
+
+
+def is_match(t1, t2, threshold=0.95):
+    """(matched, trigram similarity) for two titles."""
+    score = similarity(t1, t2)
+    return score >= threshold and same_words(t1, t2), score
+
+
+class MinHashIndex:
+    def __init__(self, threshold=0.95, num_perm=64, bands=16, seed=1):
+        assert num_perm % bands == 0
+        self.threshold = threshold
+        self.bands, self.rows = bands, num_perm // bands
+        rng = random.Random(seed)  # fixed, so signatures are stable across runs
+        self.perms = [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(num_perm)]
+        self.buckets = {}
+        self.sets = {}
+        self.titles = {}
+
+    def signature(self, grams):
+        hashes = [zlib.crc32(g.encode()) for g in grams]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self.perms]
+
+    def _bands(self, sig):
+        r = self.rows
+        return [(i, tuple(sig[i * r:(i + 1) * r])) for i in range(self.bands)]
+
+    def add(self, key, title):
+        grams = shingles(title)
+        if not grams:
+            return
+        self.sets[key] = grams
+        self.titles[key] = title
+        for band in self._bands(self.signature(grams)):
+            self.buckets.setdefault(band, set()).add(key)
+
+    def query(self, title):
+        """
+        Best (key, similarity) at or above the threshold with the same words
+        (see same_words), else (None, best score).
+        """
+        grams = shingles(title)
+        if not grams:
+            return None, 0.0
+        cands = set()
+        for band in self._bands(self.signature(grams)):
+            cands |= self.buckets.get(band, set())
+        best, score, top = None, 0.0, 0.0
+        for key in cands:
+            s = jaccard(grams, self.sets[key])
+            top = max(top, s)
+            if s >= self.threshold and s > score and same_words(title, self.titles[key]):
+                best, score = key, s
+        return (best, score) if best is not None else (None, top)
@@ -1,7 +1,7 @@
 import pandas as pd
 import os
 from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
-import pickle
+from OpenreviewScrape.note_store import NoteStore
 
 keys = [
     "title",
@@ -24,16 +24,21 @@ keys = [
 
 
 def load_conference_notes_data(
-    str_to_search="robot-learning_org_CoRL_2024_Conference.pkl",
+    str_to_search="robot-learning_org_CoRL_2024_Conference.sqlite",
 ):
     conferences_folder = f"{PROJECT_ROOT_DIR}/ConferencesData"
-    notes_files = [f for f in os.listdir(conferences_folder) if str_to_search in f]
+    notes_files = [
+        f
+        for f in os.listdir(conferences_folder)
+        if str_to_search in f and f.endswith(".sqlite")
+    ]
 
     notes = []
     for notes_file in notes_files:
         file_path = os.path.join(conferences_folder, notes_file)
-        with open(file_path, "rb") as f:
-            notes.extend(pickle.load(f))
+        store = NoteStore(file_path)
+        notes.extend(store.load(columns=keys))
+        store.close()
 
     return notes
 
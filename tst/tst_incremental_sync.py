@@ -0,0 +1,129 @@
+import tempfile
+
+import openreview
+
+from OpenreviewScrape import openreview_utils
+from OpenreviewScrape.note_store import NoteStore, StoredNote
+from OpenreviewScrape.rate_limit import TokenBucket
+
+VENUE = "Fake.cc/2025/Conference"
+
+
+class FakeClient:
+    """Serves notes for one invitation; get_notes has openreview-py 2.3.0's signature."""
+
+    def __init__(self, invitation, notes):
+        self.invitation = invitation
+        self.notes = notes
+        self.calls = list()
+
+    def get_notes(self, id=None, external_id=None, paperhash=None, forum=None,
+                  invitation=None, parent_invitations=None, replyto=None,
+                  tauthor=None, signature=None, transitive_members=None,
+                  signatures=None, writer=None, trash=None, number=None,
+                  content=None, limit=None, offset=None, after=None,
+                  mintcdate=None, domain=None, paper_hash=None, details=None,
+                  sort=None, with_count=None, stream=None):
+        self.calls.append((invitation, offset, sort))
+        if invitation != self.invitation:
+            return []
+        notes = list(self.notes.values())
+        field, order = (sort or "number:asc").split(":")
+        notes.sort(key=lambda note: getattr(note, field), reverse=order == "desc")
+        offset = offset or 0
+        return notes[offset:offset + limit] if limit else notes[offset:]
+
+
+def make_note(number, tmdate):
+    return StoredNote(
+        f"note{number}", number=number, tmdate=tmdate, mdate=tmdate,
+        content={"title": {"value": f"Paper {number}"}},
+    )
+
+
+def tst_incremental_sync(page_size=10):
+    folder = tempfile.mkdtemp()
+    rate_limiter = TokenBucket(f"{folder}/rate.json", max_rate=1000)
+    notes = {n: make_note(n, 1000 + n) for n in range(1, 26)}
+    # Venue only published under /-/Paper: /-/Submission comes back empty
+    client = FakeClient(f"{VENUE}/-/Paper", notes)
+    store = NoteStore(f"{folder}/venue.sqlite")
+
+    count = openreview_utils.fetch_notes_checkpointed(
+        client, VENUE, store, rate_limiter=rate_limiter, page_size=page_size
+    )
+    assert count == 25 and store.count() == 25
+    assert store.get_meta("invitation") == f"{VENUE}/-/Paper"
+    store.set_meta("tmdate", store.latest_modification())
+
+    # One edit; the incremental sync fetches it plus the boundary note whose
+    # tmdate equals `since`, and nothing older
+    notes[3] = StoredNote("note3", number=3, tmdate=5000, mdate=5000,
+                          content={"title": {"value": "Paper 3 (revised)"}})
+    client.calls.clear()
+    count = openreview_utils.fetch_notes_checkpointed(
+        client, VENUE, store, rate_limiter=rate_limiter,
+        since=store.get_meta("tmdate"), page_size=page_size,
+    )
+    assert count == 2, count
+    assert all(invitation == f"{VENUE}/-/Paper" for invitation, _, _ in client.calls)
+    assert len(client.calls) == 1  # stopped at the first older note
+    titles = {note.id: note.content["title"]["value"] for note in store.load()}
+    assert titles["note3"] == "Paper 3 (revised)"
+
+    # A store filled before the invitation was recorded looks it up once
+    store.set_meta("invitation", None)
+    store.set_meta("tmdate", store.latest_modification())
+    count = openreview_utils.fetch_notes_checkpointed(
+        client, VENUE, store, rate_limiter=rate_limiter,
+        since=store.get_meta("tmdate"), page_size=page_size,
+    )
+    assert count == 1 and store.get_meta("invitation") == f"{VENUE}/-/Paper"
+    print("tst_incremental_sync: ok")
+
+
+class FailingClient(FakeClient):
+    """Raises a server error once when asked for the page at fail_offset."""
+
+    def __init__(self, invitation, notes, fail_offset):
+        super().__init__(invitation, notes)
+        self.fail_offset = fail_offset
+
+    def get_notes(self, invitation=None, limit=None, offset=None, sort=None, **kwargs):
+        if invitation == self.invitation and offset == self.fail_offset:
+            self.fail_offset = None
+            raise openreview.OpenReviewException(
+                {"name": "Error", "message": "Internal Server Error", "status": 500}
+            )
+        return super().get_notes(invitation=invitation, limit=limit, offset=offset,
+                                 sort=sort, **kwargs)
+
+
+def tst_failure_keeps_checkpoint(page_size=10):
+    folder = tempfile.mkdtemp()
+    rate_limiter = TokenBucket(f"{folder}/rate.json", max_rate=1000)
+    notes = {n: make_note(n, 1000 + n) for n in range(1, 26)}
+    client = FailingClient(f"{VENUE}/-/Submission", notes, fail_offset=20)
+    store = NoteStore(f"{folder}/venue.sqlite")
+
+    try:
+        openreview_utils.fetch_notes_checkpointed(
+            client, VENUE, store, rate_limiter=rate_limiter, page_size=page_size
+        )
+        raise AssertionError("a failure after the first page must propagate")
+    except openreview.OpenReviewException:
+        pass
+    assert store.count() == 20
+    assert store.get_meta("fetch_checkpoint")["offset"] == 20
+
+    count = openreview_utils.fetch_notes_checkpointed(
+        client, VENUE, store, rate_limiter=rate_limiter, page_size=page_size
+    )
+    assert count == 25 and store.count() == 25
+    assert store.get_meta("fetch_checkpoint") is None
+    print("tst_failure_keeps_checkpoint: ok")
+
+
+if __name__ == "__main__":
+    tst_incremental_sync()
+    tst_failure_keeps_checkpoint()
@@ -0,0 +1,99 @@
+import http.server
+import json
+import os
+import sys
+import tempfile
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from OpenreviewScrape.definitions import PROJECT_ROOT_DIR
+
+# paperId -> S2 record served by the stand-in; P3 is unknown to it
+PAPERS = {
+    "P1": {"paperId": "P1", "title": "Paper One", "citationCount": 11, "influentialCitationCount": 1},
+    "P2": {"paperId": "P2", "title": "Paper Two", "citationCount": 22, "influentialCitationCount": 2},
+    "P4": {"paperId": "P4", "title": "Paper Four", "citationCount": 44, "influentialCitationCount": 4},
+}
+
+
+class S2StandIn(http.server.BaseHTTPRequestHandler):
+    """Semantic Scholar's batch and title-match endpoints, served from PAPERS."""
+
+    batches = list()
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        assert url.path == "/paper/batch", url.path
+        assert "citationCount" in parse_qs(url.query)["fields"][0]
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert list(body) == ["ids"] and len(body["ids"]) <= 500, body
+        self.batches.append(body["ids"])
+        # One result per id, in request order; null for unknown ids
+        self.send_json(200, [PAPERS.get(pid) for pid in body["ids"]])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        assert url.path == "/paper/search/match", url.path
+        query = parse_qs(url.query)["query"][0]
+        data = [p for p in PAPERS.values() if p["title"] == query]
+        if not data:
+            self.send_json(404, {"error": "Title match not found"})
+        else:
+            self.send_json(200, {"data": data})
+
+    def log_message(self, *args):
+        pass
+
+
+def tst_s2_batch_refresh():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), S2StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["S2_API"] = f"http://127.0.0.1:{server.server_port}"
+    sys.path.insert(0, f"{PROJECT_ROOT_DIR}/specific_scripts")
+    import fetch_citations
+    from citations_journal import CitationsJournal
+
+    journal = CitationsJournal(os.path.join(tempfile.mkdtemp(), "citations_s2.jsonl"))
+    old = {"influential": 0, "fetched": 0}  # stamped long ago, so stale
+    journal.put("paperone", {**old, "cites": 1, "id": "P1"})
+    journal.put("papertwo", {**old, "cites": 2, "id": "P2"})
+    journal.put("paperthree", {**old, "cites": 3, "id": "P3"})
+    journal.put("paperfour", {"cites": None, "fetched": 0})  # unmatched so far
+    papers = [
+        ("ICLR 2025", title, *[None] * 7, [], None)
+        for title in ["Paper One", "Paper Two", "Paper Three", "Paper Four", "Paper Five"]
+    ]
+
+    match, batch = fetch_citations.plan(papers, journal.cache, budget=10, now=1e9)
+    assert sorted(match) == ["Paper Five", "Paper Four"], match
+    assert sorted(batch) == ["paperone", "paperthree", "papertwo"], batch
+
+    updated = fetch_citations.refresh(journal, batch)
+    assert updated == 2, updated
+    assert [sorted(ids) for ids in S2StandIn.batches] == [["P1", "P2", "P3"]]
+    # Each result lands on the key of the id it answers
+    assert journal.cache["paperone"]["cites"] == 11 and journal.cache["paperone"]["id"] == "P1"
+    assert journal.cache["papertwo"]["cites"] == 22 and journal.cache["papertwo"]["id"] == "P2"
+    # A null result keeps the old counts
+    assert journal.cache["paperthree"] == {**old, "cites": 3, "id": "P3"}
+
+    # Unresolved titles go through title matching instead
+    entry = fetch_citations.fetch_one("Paper Four")
+    assert entry["cites"] == 44 and entry["id"] == "P4", entry
+    assert fetch_citations.fetch_one("Paper Five")["cites"] is None
+
+    journal.close()
+    server.shutdown()
+    print("tst_s2_batch_refresh: ok")
+
+
+if __name__ == "__main__":
+    tst_s2_batch_refresh()